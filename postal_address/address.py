@@ -21,25 +21,72 @@ from __future__ import (
     unicode_literals
 )
 
+import hashlib
 import random
+from abc import ABCMeta, abstractmethod
 import re
+import sys
+from collections import namedtuple
+from operator import attrgetter, methodcaller
 
-import faker
+from boltons.cacheutils import cached, LRI
+from boltons.dictutils import FrozenDict
 from boltons.strutils import slugify
-from pycountry import countries, subdivisions
 
 from . import PY2, PY3
+from .cache import MemoCache
 from .territory import (
     country_from_subdivision,
     default_subdivision_code,
     normalize_territory_code,
+    supported_country_codes,
     territory_children_codes,
+    territory_data,
     territory_parents
 )
 
 if PY3:
     basestring = (str, bytes)
 
+try:
+    from abc import ABC
+except ImportError:
+    # Python 2 equivalent of abc.ABC.
+    ABC = ABCMeta(str('ABC'), (object,), {'__slots__': ()})
+
+# Characters not allowed in postal codes.
+POSTAL_CODE_INVALID_CHARS = re.compile(r'[^A-Z0-9 -]')
+
+# Sequences of mixed hyphens and spaces, with at least one hyphen.
+POSTAL_CODE_HYPHENS = re.compile(r'[^A-Z0-9]*-+[^A-Z0-9]*')
+
+# Memoization cache of normalization outcomes, keyed on raw base fields and
+# normalization mode. Disabled by default: enable it with its ``resize()``
+# method, and optionally set its ``ttl``.
+NORMALIZATION_CACHE = MemoCache(max_size=0)
+
+# Base fields in the order used by ``NORMALIZATION_CACHE`` keys and values.
+NORMALIZATION_CACHE_FIELDS = (
+    'line1', 'line2', 'postal_code', 'city_name', 'country_code',
+    'subdivision_code')
+
+# Bit flags of base fields, to track fields changed since last normalization.
+FIELD_FLAGS = {
+    field_id: 1 << index
+    for index, field_id in enumerate(NORMALIZATION_CACHE_FIELDS)}
+ALL_FIELD_FLAGS = sum(FIELD_FLAGS.values())
+
+# Fields on which the different normalization steps depend.
+LINE_FLAGS = FIELD_FLAGS['line1'] | FIELD_FLAGS['line2']
+TERRITORY_FLAGS = (
+    FIELD_FLAGS['country_code'] | FIELD_FLAGS['subdivision_code'] |
+    # City names are checked against, or replaced by, subdivision metadata.
+    FIELD_FLAGS['city_name'])
+
+# Upper bound of memoized per-subdivision results. Large enough to hold all
+# subdivisions known to pycountry.
+SUBDIVISION_CACHE_SIZE = 8192
+
 
 class InvalidAddress(ValueError):
     """ Custom exception providing details about address failing validation.
@@ -77,30 +124,48 @@ class InvalidAddress(ValueError):
         return '{}.'.format('; '.join(reasons))
 
 
-class Address(object):
+class ValidationResult(namedtuple('ValidationResult', [
+        'required_fields', 'invalid_fields', 'inconsistent_fields'])):
 
-    """ Define a postal address.
+    """ Outcome of an address validation, as returned by ``check()``.
 
-    All addresses share the following fields:
-    * ``line1`` (required): a non-constrained string.
-    * ``line2``: a non-constrained string.
-    * ``postal_code`` (required): a non-constrained string (see issue #2).
-    * ``city_name`` (required): a non-constrained string.
-    * ``country_code`` (required): an ISO 3166-1 alpha-2 code.
-    * ``subdivision_code``: an ISO 3166-2 code.
+    Bad fields are classified the same way as in ``InvalidAddress``.
+    """
 
-    At instanciation, the ``normalize()`` method is called. The latter try to
-    clean-up the data and populate empty fields that can be derived from
-    others. As such, ``city_name`` can be overriden by ``subdivision_code``.
-    See the internal ``SUBDIVISION_METADATA_WHITELIST`` constant.
+    __slots__ = ()
 
-    If inconsistencies are found at the normalization step, they are left as-is
-    to give a chance to the ``validate()`` method to catch them. Which means
-    that, after each normalization (including the one at initialization), it is
-    your job to call the ``validate()`` method manually to check that the
-    address is good.
+    @property
+    def valid(self):
+        """ Return a boolean indicating if no bad field was found. """
+        return not (
+            self.required_fields or self.invalid_fields or
+            self.inconsistent_fields)
+
+    def exception(self):
+        """ Return the ``InvalidAddress`` exception matching this result. """
+        return InvalidAddress(*self)
+
+
+class BaseAddress(ABC):
+
+    """ Common implementation of postal addresses.
+
+    Normalization, validation and rendering of address fields are implemented
+    here, independently of the way fields are stored. This abstract class
+    can't be instantiated: see ``Address`` and ``CompactAddress``.
     """
 
+    __slots__ = ()
+
+    # Defaults of the state shared by all storages. Subclasses hold their own
+    # values in instance attributes or slots.
+    # Territory objects, along with the code they were looked up for.
+    _country_cache = None
+    _subdivision_cache = None
+    # Flags of fields changed since the last normalization, and its mode.
+    _dirty_flags = ALL_FIELD_FLAGS
+    _normalized_mode = None
+
     # Fields common to any postal address. Those are free-form fields, allowed
     # to be set directly by the user, although their values might be normalized
     # and clean-up automatticaly by the validation method.
@@ -123,23 +188,124 @@ class Address(object):
 
         By default, normalization is ``strict``.
         """
+        self._load_fields(kwargs)
+
+        # Normalize addresses fields.
+        self.normalize(strict=strict)
+
+    @classmethod
+    def from_normalized(cls, line1=None, line2=None, postal_code=None,
+                        city_name=None, country_code=None,
+                        subdivision_code=None, check_rate=0):
+        """ Build an address from trusted fields, already normalized.
+
+        Fields are neither checked, normalized nor validated, and subdivision
+        metadata are only derived on first access.
+
+        :param check_rate: Probability, between 0 and 1, of checking that the
+        provided fields are left untouched by normalization. Meant for
+        debugging.
+        :return: An address, considered as normalized in strict mode.
+        """
+        address = cls.__new__(cls)
+        address._load_normalized((
+            line1, line2, postal_code, city_name, country_code,
+            subdivision_code))
+        if check_rate and random.random() < check_rate:
+            address._check_normalized()
+        return address
+
+    def fingerprint(self):
+        """ Return the canonical ``Fingerprint`` of the address.
+
+        See ``address_fingerprint()``.
+        """
+        return address_fingerprint(self)
+
+    def freeze(self):
+        """ Return a ``FrozenAddress`` of current base fields. """
+        return FrozenAddress(*(
+            self[field_id] for field_id in NORMALIZATION_CACHE_FIELDS))
+
+    def _check_normalized(self):
+        """ Check that normalization leaves base fields untouched.
+
+        :raise ValueError: If the address is not normalized.
+        """
+        fields = {field_id: self[field_id] for field_id in self.BASE_FIELD_IDS}
+        try:
+            normalized = self.__class__(**fields)
+        except (InvalidAddress, TypeError) as exception:
+            raise ValueError("{!r} can't be normalized: {}".format(
+                fields, exception))
+        changed_fields = sorted(
+            field_id for field_id in self.BASE_FIELD_IDS
+            if normalized[field_id] != fields[field_id])
+        if changed_fields:
+            raise ValueError("{!r} is not normalized: {}.".format(
+                fields, ', '.join(
+                    '{}={!r} instead of {!r}'.format(
+                        field_id, normalized[field_id], fields[field_id])
+                    for field_id in changed_fields)))
+
+    # Storage hooks, implemented by subclasses.
+
+    @abstractmethod
+    def _init_fields(self):
+        """ Reset all fields, and mark them as not normalized. """
+
+    @abstractmethod
+    def _load_normalized(self, values):
+        """ Set trusted base fields, in ``NORMALIZATION_CACHE_FIELDS`` order,
+        and mark them as normalized in strict mode. """
+
+    @abstractmethod
+    def _update_fields(self, fields):
+        """ Set base fields and subdivision metadata without any check. """
+
+    @abstractmethod
+    def _lookup(self, field_id):
+        """ Return the value of a field, or ``None`` if it is not set. """
+
+    def __getattr__(self, name):
+        """ Expose fields as attributes. """
+        raise AttributeError(name)
+
+    @abstractmethod
+    def keys(self):
+        """ Return field IDs. """
+
+    @abstractmethod
+    def values(self):
+        """ Return field values. """
+
+    @abstractmethod
+    def items(self):
+        """ Return field IDs & values. """
+
+    def __setattr__(self, name, value):
+        """ Allow update of address fields as attributes. """
+        if name in self.BASE_FIELD_IDS:
+            self[name] = value
+            return
+        super(BaseAddress, self).__setattr__(name, value)
+
+    def _load_fields(self, fields):
+        """ Reset the address and set its base fields from a mapping. """
         # Only common fields are allowed to be set directly.
-        unknown_fields = set(kwargs).difference(self.BASE_FIELD_IDS)
+        unknown_fields = set(fields).difference(self.BASE_FIELD_IDS)
         if unknown_fields:
             raise KeyError(
                 "{!r} fields are not allowed to be set freely.".format(
                     unknown_fields))
 
-        # Normalized field's IDs and values of the address are stored here.
-        self._fields = dict.fromkeys(self.BASE_FIELD_IDS)
+        # Reset all fields.
+        self._init_fields()
 
         # Load provided fields.
-        for field_id, field_value in kwargs.items():
+        for field_id, field_value in fields.items():
             self[field_id] = field_value
 
-        # Normalize addresses fields.
-        self.normalize(strict=strict)
-
     def __repr__(self):
         """ Print all fields available from the address.
 
@@ -168,129 +334,16 @@ class Address(object):
             string = string.encode('utf-8')
         return string
 
-    def __getattr__(self, name):
-        """ Expose fields as attributes. """
-        if name in self._fields:
-            return self._fields[name]
-        raise AttributeError
-
-    def __setattr__(self, name, value):
-        """ Allow update of address fields as attributes. """
-        if name in self.BASE_FIELD_IDS:
-            self[name] = value
-            return
-        super(Address, self).__setattr__(name, value)
-
-    # Let an address be accessed like a dict of its fields IDs & values.
-    # This is a proxy to the internal _fields dict.
-
-    def __len__(self):
-        """ Return the number of fields. """
-        return len(self._fields)
-
-    def __getitem__(self, key):
-        """ Return the value of a field. """
-        if not isinstance(key, basestring):
-            raise TypeError
-        return self._fields[key]
-
-    def __setitem__(self, key, value):
-        """ Set a field's value.
-
-        Only base fields are allowed to be set explicitely.
-        """
-        if not isinstance(key, basestring):
-            raise TypeError
-        if not (isinstance(value, basestring) or value is None):
-            raise TypeError
-        if key not in self.BASE_FIELD_IDS:
-            raise KeyError
-        self._fields[key] = value
-
-    def __delitem__(self, key):
-        """ Remove a field. """
-        if key in self.BASE_FIELD_IDS:
-            self._fields[key] = None
-        else:
-            del self._fields[key]
-
-    def __iter__(self):
-        """ Iterate over field IDs. """
-        for field_id in self._fields:
-            yield field_id
-
-    def keys(self):
-        """ Return a list of field IDs. """
-        return self._fields.keys()
-
-    def values(self):
-        """ Return a list of field values. """
-        return self._fields.values()
-
-    def items(self):
-        """ Return a list of field IDs & values. """
-        return self._fields.items()
-
     def render(self, separator='\n'):
         """ Render a human-friendly address block.
 
-        The block is composed of:
-        * The ``line1`` field rendered as-is if not empty.
-        * The ``line2`` field rendered as-is if not empty.
-        * A third line made of the postal code, the city name and state name if
-          any is set.
-        * A fourth optionnal line with the subdivision name if its value does
-          not overlap with the city, state or country name.
-        * The last line feature country's common name.
+        The block follows the layout registered for the country of the address
+        in ``RENDERERS``, else the default one of ``render_default()``.
         """
-        lines = []
-
-        if self.line1:
-            lines.append(self.line1)
-
-        if self.line2:
-            lines.append(self.line2)
-
-        # Build the third line.
-        line3_elements = []
-        if self.city_name:
-            line3_elements.append(self.city_name)
-        if hasattr(self, 'state_name'):
-            # XXX It might not be a good idea to deduplicate state and city.
-            # See: https://en.wikipedia.org/wiki
-            # /List_of_U.S._cities_named_after_their_state
-            line3_elements.append(self.state_name)
-        # Separate city and state by a comma.
-        line3_elements = [', '.join(line3_elements)]
-        if self.postal_code:
-            line3_elements.insert(0, self.postal_code)
-        # Separate the leading zip code and the rest by a dash.
-        line3 = ' - '.join(line3_elements)
-        if line3:
-            lines.append(line3)
-
-        # Compare the vanilla subdivision name to properties that are based on
-        # it and used in the current ``render()`` method to produce a printable
-        # address. If none overlap, then print an additional line with the
-        # subdivision name as-is to provide extra, non-redundant, territory
-        # precision.
-        subdiv_based_properties = [
-            'city_name', 'state_name', 'country_name']
-        subdiv_based_values = [
-            getattr(self, prop_id) for prop_id in subdiv_based_properties
-            if hasattr(self, prop_id)]
-        if self.subdivision_name and \
-                self.subdivision_name not in subdiv_based_values:
-            lines.append(self.subdivision_name)
-
-        # Place the country line at the end.
-        if self.country_name:
-            lines.append(self.country_name)
-
-        # Render the address block with the provided separator.
-        return separator.join(lines)
-
-    def normalize(self, strict=True):
+        return RENDERERS.get(self.country_code, render_default)(
+            self, separator)
+
+    def normalize(self, strict=True, territory_cache=None):
         """ Normalize address fields.
 
         If values are unrecognized or invalid, they will be set to None.
@@ -300,72 +353,144 @@ class Address(object):
         entered by the user. If set to ``False``, territory-derived values
         takes precedence over user's.
 
+        A ``MemoCache`` can be provided as ``territory_cache`` to share the
+        resolution of territory codes between several normalizations.
+
+        Outcomes are memoized in ``NORMALIZATION_CACHE``, if enabled.
+
+        Only the steps depending on fields changed since the last
+        normalization in the same mode are performed again.
+
         You need to call back the ``validate()`` method afterwards to properly
         check that the fully-qualified address is ready for consumption.
         """
+        if not self._dirty_flags and self._normalized_mode == strict:
+            return
+        try:
+            self._cached_normalize(strict, territory_cache)
+        except Exception:
+            # Leave the address in need of a full normalization.
+            self._dirty_flags = ALL_FIELD_FLAGS
+            self._normalized_mode = None
+            raise
+        self._dirty_flags = 0
+        self._normalized_mode = strict
+
+    @property
+    def dirty_fields(self):
+        """ Return the set of base field IDs changed since the last
+        normalization. """
+        return frozenset(
+            field_id for field_id, flag in FIELD_FLAGS.items()
+            if self._dirty_flags & flag)
+
+    def _cached_normalize(self, strict, territory_cache):
+        """ Normalize address fields, using ``NORMALIZATION_CACHE``. """
+        cache_key = None
+        if NORMALIZATION_CACHE.max_size > 0:
+            cache_key = tuple(
+                self[field_id] for field_id in NORMALIZATION_CACHE_FIELDS) + (
+                    strict,)
+            outcome = NORMALIZATION_CACHE.get(cache_key)
+            if outcome is not None:
+                self._replay_normalization(*outcome)
+                return
+
+        try:
+            parent_metadata = self._normalize(strict, territory_cache)
+        except InvalidAddress as exception:
+            if cache_key is not None:
+                NORMALIZATION_CACHE.set(cache_key, (
+                    self._normalization_values(), None, (
+                        frozenset(exception.required_fields),
+                        tuple(exception.invalid_fields.items()),
+                        frozenset(exception.inconsistent_fields),
+                        exception.extra_msg)))
+            raise
+        if cache_key is not None:
+            NORMALIZATION_CACHE.set(cache_key, (
+                self._normalization_values(), parent_metadata, None))
+
+    def _normalization_values(self):
+        """ Return the values of base fields, as cached by ``normalize()``. """
+        return tuple(
+            self[field_id] for field_id in NORMALIZATION_CACHE_FIELDS)
+
+    def _replay_normalization(self, values, parent_metadata, error):
+        """ Apply the cached outcome of a normalization. """
+        self._update_fields(dict(zip(NORMALIZATION_CACHE_FIELDS, values)))
+        if error:
+            required_fields, invalid_fields, inconsistent_fields, extra_msg = \
+                error
+            raise InvalidAddress(
+                set(required_fields), dict(invalid_fields),
+                set(inconsistent_fields), extra_msg)
+        if parent_metadata:
+            self._update_fields(parent_metadata)
+
+    def _normalize(self, strict, territory_cache):
+        """ Uncached implementation of ``normalize()``.
+
+        :return: The metadata added to the address, if any.
+        """
+        # Normalization is idempotent, so steps which only depend on fields
+        # left untouched since the last normalization can be skipped.
+        dirty_flags = self._dirty_flags
+        if self._normalized_mode != strict:
+            dirty_flags = ALL_FIELD_FLAGS
+        dirty_fields = [
+            field_id for field_id in NORMALIZATION_CACHE_FIELDS
+            if dirty_flags & FIELD_FLAGS[field_id]]
+
         # Strip postal codes of any characters but alphanumerics, spaces and
         # hyphens.
-        if self.postal_code:
-            self.postal_code = self.postal_code.upper()
-            # Remove unrecognized characters.
-            self.postal_code = re.compile(
-                r'[^A-Z0-9 -]').sub('', self.postal_code)
-            # Reduce sequences of mixed hyphens and spaces to single hyphen.
-            self.postal_code = re.compile(
-                r'[^A-Z0-9]*-+[^A-Z0-9]*').sub('-', self.postal_code)
-            # Edge case: remove leading and trailing hyphens and spaces.
-            self.postal_code = self.postal_code.strip('-')
-
-        # Normalize spaces.
-        for field_id, field_value in self.items():
+        if self.postal_code and 'postal_code' in dirty_fields:
+            self['postal_code'] = normalize_postal_code(self.postal_code)
+
+        # Normalize spaces. Subdivision metadata are left untouched.
+        for field_id in dirty_fields:
+            field_value = self[field_id]
             if isinstance(field_value, basestring):
-                try:
-                    self[field_id] = ' '.join(field_value.split())
-                except KeyError:
-                    # Invalid field_id, usually all the 'subdivision_metadata'
-                    pass
+                new_value = ' '.join(field_value.split())
+                if new_value != field_value:
+                    self[field_id] = new_value
 
         # Reset empty and blank strings.
-        empty_fields = [f_id for f_id, f_value in self.items() if not f_value]
-        for field_id in empty_fields:
-            del self[field_id]
+        for field_id in dirty_fields:
+            if not self[field_id]:
+                del self[field_id]
 
         # Swap lines if the first is empty.
-        if self.line2 and not self.line1:
-            self.line1, self.line2 = self.line2, self.line1
-
-        # Normalize territory codes. Unrecognized territory codes are reset
-        # to None.
-        for territory_id in ['country_code', 'subdivision_code']:
-            territory_code = getattr(self, territory_id)
-            if territory_code:
-                try:
-                    code = normalize_territory_code(
-                        territory_code, resolve_aliases=False)
-                except ValueError:
-                    code = None
-                setattr(self, territory_id, code)
-
-        # Try to set default subdivision from country if not set.
-        if self.country_code and not self.subdivision_code:
-            self.subdivision_code = default_subdivision_code(self.country_code)
-            # If the country set its own subdivision, reset it. It will be
-            # properly re-guessed below.
-            if self.subdivision_code:
-                self.country_code = None
+        if dirty_flags & LINE_FLAGS and self.line2 and not self.line1:
+            self['line1'], self['line2'] = self.line2, self.line1
+
+        # Subdivisions set from country codes don't pass strict checks twice,
+        # so they are always checked again, like on a full normalization.
+        if not dirty_flags & TERRITORY_FLAGS:
+            if not self.subdivision_code:
+                return None
+            if self.subdivision_code in territory_data()[
+                    'subdivision_countries']:
+                # Metadata are already set, and are the same a full
+                # normalization would produce.
+                return subdivision_parents_metadata(self.subdivision_code)
+
+        # Normalize territory codes and fetch metadata of their parents.
+        territory_key = (self.country_code, self.subdivision_code)
+        resolved = None
+        if territory_cache is not None:
+            resolved = territory_cache.get(territory_key)
+        if resolved is None:
+            resolved = resolve_territory(*territory_key)
+            if territory_cache is not None:
+                territory_cache.set(territory_key, resolved)
+        country_code, subdivision_code, parent_metadata = resolved
+        self['country_code'] = country_code
+        self['subdivision_code'] = subdivision_code
 
         # Automatically populate address fields with metadata extracted from
         # all subdivision parents.
-        if self.subdivision_code:
-            parent_metadata = {
-                # All subdivisions have a parent country.
-                'country_code': country_from_subdivision(
-                    self.subdivision_code)}
-
-            # Add metadata of each subdivision parent.
-            for parent_subdiv in territory_parents(
-                    self.subdivision_code, include_country=False):
-                parent_metadata.update(subdivision_metadata(parent_subdiv))
+        if parent_metadata:
 
             # Parent metadata are not allowed to overwrite address fields
             # if not blank, unless strict mode is de-activated.
@@ -373,8 +498,10 @@ class Address(object):
                 for field_id, new_value in parent_metadata.items():
                     # New metadata are not allowed to be blank.
                     assert new_value
-                    current_value = self._fields.get(field_id)
-                    if current_value and field_id in self.BASE_FIELD_IDS:
+                    if field_id not in self.BASE_FIELD_IDS:
+                        continue
+                    current_value = self[field_id]
+                    if current_value:
 
                         # Build the list of substitute values that are
                         # equivalent to our new normalized target.
@@ -383,8 +510,9 @@ class Address(object):
                             # Allow normalization if the current country code
                             # is the direct parent of a subdivision which also
                             # have its own country code.
-                            alias_values.add(subdivisions.get(
-                                code=self.subdivision_code).country_code)
+                            alias_values.add(territory_data()[
+                                'subdivision_countries'][
+                                    self.subdivision_code])
 
                         # Change of current value is allowed if it is a direct
                         # substitute to our new normalized value.
@@ -398,25 +526,36 @@ class Address(object):
                                     field_id, current_value,
                                     field_id, new_value))
 
-            self._fields.update(parent_metadata)
+            self._update_fields(parent_metadata)
+        return parent_metadata
 
-    def validate(self):
+    def check(self):
         """ Check fields consistency and requirements in one go.
 
-        Properly check that fields are consistent between themselves, and only
-        raise an exception at the end, for the whole address object. Our custom
-        exception will provide a detailed status of bad fields.
-        """
+        Same as ``validate()``, but returns the status of bad fields instead of
+        raising an exception.
 
+        :return: A ``ValidationResult``.
+        """
         required_fields = self.check_required_fields()
         invalid_fields = self.check_invalid_fields(required_fields)
         inconsistent_fields = self.check_inconsistent_fields(required_fields,
                                                              invalid_fields)
+        return ValidationResult(
+            required_fields, invalid_fields, inconsistent_fields)
+
+    def validate(self):
+        """ Check fields consistency and requirements in one go.
+
+        Properly check that fields are consistent between themselves, and only
+        raise an exception at the end, for the whole address object. Our custom
+        exception will provide a detailed status of bad fields.
+        """
+        result = self.check()
 
         # Raise our custom exception if any value is wrong.
-        if required_fields or invalid_fields or inconsistent_fields:
-            raise InvalidAddress(
-                required_fields, invalid_fields, inconsistent_fields)
+        if not result.valid:
+            raise result.exception()
 
     def check_required_fields(self):
         """Check that all required fields are set.
@@ -437,18 +576,15 @@ class Address(object):
         :return:
         """
         invalid_fields = dict()
+        data = territory_data()
         if 'country_code' not in required_fields:
             # Check that the country code exists.
-            try:
-                countries.get(alpha_2=self.country_code)
-            except KeyError:
+            if self.country_code.upper() not in data['country_codes']:
                 invalid_fields['country_code'] = self.country_code
 
         if self.subdivision_code and 'subdivision_code' not in required_fields:
             # Check that the country code exists.
-            try:
-                subdivisions.get(code=self.subdivision_code)
-            except KeyError:
+            if self.subdivision_code.upper() not in data['subdivision_codes']:
                 invalid_fields['subdivision_code'] = self.subdivision_code
         return invalid_fields
 
@@ -483,11 +619,7 @@ class Address(object):
     @property
     def valid(self):
         """ Return a boolean indicating if the address is valid. """
-        try:
-            self.validate()
-        except InvalidAddress:
-            return False
-        return True
+        return self.check().valid
 
     @property
     def empty(self):
@@ -507,10 +639,20 @@ class Address(object):
 
     @property
     def country(self):
-        """ Return country object. """
-        if self.country_code:
-            return countries.get(alpha_2=self.country_code)
-        return None
+        """ Return country object.
+
+        It is cached until ``country_code`` changes.
+        """
+        if not self.country_code:
+            return None
+        entry = self._country_cache
+        if entry is None or entry[0] != self.country_code:
+            from pycountry import countries
+
+            entry = (
+                self.country_code, countries.get(alpha_2=self.country_code))
+            self._country_cache = entry
+        return entry[1]
 
     @property
     def country_name(self):
@@ -520,49 +662,694 @@ class Address(object):
         latter isoften pompous, and sometimes false (i.e. not in sync with
         current political situation).
         """
-        if self.country:
-            if hasattr(self.country, 'common_name'):
-                return self.country.common_name
-            return self.country.name
+        country = self.country
+        if country:
+            if hasattr(country, 'common_name'):
+                return country.common_name
+            return country.name
         return None
 
     @property
     def subdivision(self):
-        """ Return subdivision object. """
-        if self.subdivision_code:
-            return subdivisions.get(code=self.subdivision_code)
-        return None
+        """ Return subdivision object.
+
+        It is cached until ``subdivision_code`` changes.
+        """
+        if not self.subdivision_code:
+            return None
+        entry = self._subdivision_cache
+        if entry is None or entry[0] != self.subdivision_code:
+            from pycountry import subdivisions
+
+            entry = (
+                self.subdivision_code,
+                subdivisions.get(code=self.subdivision_code))
+            self._subdivision_cache = entry
+        return entry[1]
 
     @property
     def subdivision_name(self):
         """ Return subdivision's name. """
-        if self.subdivision:
-            return self.subdivision.name
+        subdivision = self.subdivision
+        if subdivision:
+            return subdivision.name
         return None
 
     @property
     def subdivision_type_name(self):
         """ Return subdivision's type human-readable name. """
-        if self.subdivision:
-            return self.subdivision.type
+        subdivision = self.subdivision
+        if subdivision:
+            return subdivision.type
         return None
 
     @property
     def subdivision_type_id(self):
         """ Return subdivision's type as a Python-friendly ID string. """
-        if self.subdivision:
-            return subdivision_type_id(self.subdivision)
+        subdivision = self.subdivision
+        if subdivision:
+            return subdivision_type_id(subdivision)
         return None
 
 
+class Address(BaseAddress):
+
+    """ Define a postal address.
+
+    All addresses share the following fields:
+    * ``line1`` (required): a non-constrained string.
+    * ``line2``: a non-constrained string.
+    * ``postal_code`` (required): a non-constrained string (see issue #2).
+    * ``city_name`` (required): a non-constrained string.
+    * ``country_code`` (required): an ISO 3166-1 alpha-2 code.
+    * ``subdivision_code``: an ISO 3166-2 code.
+
+    At instanciation, the ``normalize()`` method is called. The latter try to
+    clean-up the data and populate empty fields that can be derived from
+    others. As such, ``city_name`` can be overriden by ``subdivision_code``.
+    See the internal ``SUBDIVISION_METADATA_WHITELIST`` constant.
+
+    If inconsistencies are found at the normalization step, they are left as-is
+    to give a chance to the ``validate()`` method to catch them. Which means
+    that, after each normalization (including the one at initialization), it is
+    your job to call the ``validate()`` method manually to check that the
+    address is good.
+    """
+
+    def _init_fields(self):
+        """ Reset all fields. """
+        # Normalized field's IDs and values of the address are stored here.
+        self._fields = dict.fromkeys(self.BASE_FIELD_IDS)
+        # Territory objects, along with the code they were looked up for.
+        self._country_cache = None
+        self._subdivision_cache = None
+        # Flags of fields changed since the last normalization, and its mode.
+        self._dirty_flags = ALL_FIELD_FLAGS
+        self._normalized_mode = None
+        # Subdivision code of trusted addresses whose metadata are not loaded
+        # yet. See ``from_normalized()``.
+        self._pending_metadata = None
+
+    def _load_normalized(self, values):
+        """ Set trusted base fields, without normalization. """
+        # Bypass __setattr__, as this is the hot path of bulk loading.
+        self.__dict__.update(
+            _fields=dict(zip(NORMALIZATION_CACHE_FIELDS, values)),
+            _country_cache=None,
+            _subdivision_cache=None,
+            _dirty_flags=0,
+            _normalized_mode=True,
+            _pending_metadata=values[-1])
+
+    def _all_fields(self):
+        """ Return the dict of all fields, loading pending metadata first. """
+        if self._pending_metadata:
+            try:
+                metadata = subdivision_derived_metadata(
+                    self._pending_metadata)
+            except (KeyError, ValueError):
+                metadata = {}
+            self._pending_metadata = None
+            self._fields.update(metadata)
+        return self._fields
+
+    def __getattr__(self, name):
+        """ Expose fields as attributes. """
+        if name.startswith('_'):
+            raise AttributeError(name)
+        fields = self._all_fields()
+        if name in fields:
+            return fields[name]
+        raise AttributeError
+
+    # Let an address be accessed like a dict of its fields IDs & values.
+    # This is a proxy to the internal _fields dict.
+
+    def __len__(self):
+        """ Return the number of fields. """
+        return len(self._all_fields())
+
+    def __getitem__(self, key):
+        """ Return the value of a field. """
+        if not isinstance(key, basestring):
+            raise TypeError
+        if key in self.BASE_FIELD_IDS:
+            return self._fields[key]
+        return self._all_fields()[key]
+
+    def __setitem__(self, key, value):
+        """ Set a field's value.
+
+        Only base fields are allowed to be set explicitely.
+        """
+        if not isinstance(key, basestring):
+            raise TypeError
+        if not (isinstance(value, basestring) or value is None):
+            raise TypeError(
+                "{} field only accepts strings or None, not {}.".format(
+                    key, type(value).__name__))
+        if key not in self.BASE_FIELD_IDS:
+            raise KeyError
+        self._fields[key] = value
+        self._dirty_flags |= FIELD_FLAGS[key]
+
+    def __delitem__(self, key):
+        """ Remove a field. """
+        if key in self.BASE_FIELD_IDS:
+            self._fields[key] = None
+            self._dirty_flags |= FIELD_FLAGS[key]
+        else:
+            del self._all_fields()[key]
+            # Metadata are derived from the subdivision code, and restored by
+            # the next normalization.
+            self._dirty_flags |= FIELD_FLAGS['subdivision_code']
+
+    def __iter__(self):
+        """ Iterate over field IDs. """
+        for field_id in self._all_fields():
+            yield field_id
+
+    def keys(self):
+        """ Return a list of field IDs. """
+        return self._all_fields().keys()
+
+    def values(self):
+        """ Return a list of field values. """
+        return self._all_fields().values()
+
+    def items(self):
+        """ Return a list of field IDs & values. """
+        return self._all_fields().items()
+
+    def _lookup(self, field_id):
+        """ Return the value of a field, or ``None`` if it is not set. """
+        return self._all_fields().get(field_id)
+
+    def _update_fields(self, fields):
+        """ Set fields and subdivision metadata without any check. """
+        self._all_fields().update(fields)
+        for field_id in self.BASE_FIELD_IDS.intersection(fields):
+            self._dirty_flags |= FIELD_FLAGS[field_id]
+
+
+class CompactAddress(BaseAddress):
+
+    """ Memory-efficient variant of ``Address``.
+
+    Base fields are stored in slots, and subdivision-derived metadata are not
+    stored at all, but computed on access from the current
+    ``subdivision_code``. Deleted metadata are restored as soon as the latter
+    is set again, including by ``normalize()``. Apart from that, it behaves
+    like ``Address``.
+    """
+
+    __slots__ = (
+        'line1', 'line2', 'postal_code', 'city_name', 'country_code',
+        'subdivision_code', '_deleted_metadata', '_country_cache',
+        '_subdivision_cache', '_dirty_flags', '_normalized_mode')
+
+    def _init_fields(self):
+        """ Reset all fields. """
+        for field_id in self.BASE_FIELD_IDS:
+            object.__setattr__(self, field_id, None)
+        self._deleted_metadata = None
+        self._country_cache = None
+        self._subdivision_cache = None
+        self._dirty_flags = ALL_FIELD_FLAGS
+        self._normalized_mode = None
+
+    def _load_normalized(self, values):
+        """ Set trusted base fields, without normalization. """
+        # Bypass __setattr__, as this is the hot path of bulk loading.
+        set_slot = object.__setattr__
+        for field_id, value in zip(NORMALIZATION_CACHE_FIELDS, values):
+            set_slot(self, field_id, value)
+        set_slot(self, '_deleted_metadata', None)
+        set_slot(self, '_country_cache', None)
+        set_slot(self, '_subdivision_cache', None)
+        set_slot(self, '_dirty_flags', 0)
+        set_slot(self, '_normalized_mode', True)
+
+    def _metadata(self):
+        """ Return subdivision metadata derived from the subdivision code. """
+        if not self.subdivision_code:
+            return {}
+        try:
+            metadata = subdivision_derived_metadata(self.subdivision_code)
+        except (KeyError, ValueError):
+            # Unrecognized subdivision codes have no metadata.
+            return {}
+        if not self._deleted_metadata:
+            return metadata
+        return {
+            field_id: value for field_id, value in metadata.items()
+            if field_id not in self._deleted_metadata}
+
+    def __getattr__(self, name):
+        """ Expose subdivision metadata as attributes. """
+        # Private and unset base fields are never looked up in metadata.
+        if name.startswith('_') or name in self.BASE_FIELD_IDS:
+            raise AttributeError(name)
+        metadata = self._metadata()
+        if name in metadata:
+            return metadata[name]
+        raise AttributeError(name)
+
+    def __len__(self):
+        """ Return the number of fields. """
+        return len(self.BASE_FIELD_IDS) + len(self._metadata())
+
+    def __getitem__(self, key):
+        """ Return the value of a field. """
+        if not isinstance(key, basestring):
+            raise TypeError
+        if key in self.BASE_FIELD_IDS:
+            return getattr(self, key)
+        return self._metadata()[key]
+
+    def __setitem__(self, key, value):
+        """ Set a field's value.
+
+        Only base fields are allowed to be set explicitely.
+        """
+        if not isinstance(key, basestring):
+            raise TypeError
+        if not (isinstance(value, basestring) or value is None):
+            raise TypeError(
+                "{} field only accepts strings or None, not {}.".format(
+                    key, type(value).__name__))
+        if key not in self.BASE_FIELD_IDS:
+            raise KeyError
+        object.__setattr__(self, key, value)
+        self._dirty_flags |= FIELD_FLAGS[key]
+        if key == 'subdivision_code':
+            self._deleted_metadata = None
+
+    def __delitem__(self, key):
+        """ Remove a field. """
+        if key in self.BASE_FIELD_IDS:
+            self[key] = None
+            return
+        if key not in self._metadata():
+            raise KeyError(key)
+        self._deleted_metadata = frozenset(
+            [key]).union(self._deleted_metadata or ())
+        self._dirty_flags |= FIELD_FLAGS['subdivision_code']
+
+    def __iter__(self):
+        """ Iterate over field IDs. """
+        return iter(self.keys())
+
+    def keys(self):
+        """ Return a list of field IDs. """
+        return list(self.BASE_FIELD_IDS) + list(self._metadata())
+
+    def values(self):
+        """ Return a list of field values. """
+        return [value for _, value in self.items()]
+
+    def items(self):
+        """ Return a list of field IDs & values. """
+        return [
+            (field_id, getattr(self, field_id))
+            for field_id in self.BASE_FIELD_IDS] + list(
+                self._metadata().items())
+
+    def _lookup(self, field_id):
+        """ Return the value of a field, or ``None`` if it is not set. """
+        if field_id in self.BASE_FIELD_IDS:
+            return getattr(self, field_id)
+        return self._metadata().get(field_id)
+
+    def _update_fields(self, fields):
+        """ Set base fields without any check. Subdivision metadata are
+        derived on access. """
+        for field_id, value in fields.items():
+            if field_id in self.BASE_FIELD_IDS:
+                object.__setattr__(self, field_id, value)
+                self._dirty_flags |= FIELD_FLAGS[field_id]
+        if 'subdivision_code' in fields:
+            self._deleted_metadata = None
+
+
+class FrozenAddress(object):
+
+    """ Immutable and hashable snapshot of the base fields of an address.
+
+    Frozen addresses are equal if all their base fields are. Their hash is
+    computed once, at creation, so they are cheap to use as dict keys or in
+    sets. Fields are stored as-is: build them from normalized addresses, with
+    ``freeze()``, to compare addresses regardless of their formatting.
+    """
+
+    __slots__ = NORMALIZATION_CACHE_FIELDS + ('_hash',)
+
+    # Slots are set with object.__setattr__(), which pylint doesn't follow.
+    # pylint: disable=no-member
+
+    def __init__(self, line1=None, line2=None, postal_code=None,
+                 city_name=None, country_code=None, subdivision_code=None):
+        """ Set base fields and compute the hash. """
+        values = (
+            line1, line2, postal_code, city_name, country_code,
+            subdivision_code)
+        set_slot = object.__setattr__
+        for field_id, value in zip(NORMALIZATION_CACHE_FIELDS, values):
+            set_slot(self, field_id, value)
+        set_slot(self, '_hash', hash(values))
+
+    def __setattr__(self, name, value):
+        """ Forbid any change. """
+        raise AttributeError(
+            "{} is read-only.".format(self.__class__.__name__))
+
+    def __delattr__(self, name):
+        """ Forbid any change. """
+        raise AttributeError(
+            "{} is read-only.".format(self.__class__.__name__))
+
+    def values(self):
+        """ Return the tuple of base field values, in a fixed order. """
+        return (
+            self.line1, self.line2, self.postal_code, self.city_name,
+            self.country_code, self.subdivision_code)
+
+    def __iter__(self):
+        """ Iterate over base field values, in a fixed order. """
+        return iter(self.values())
+
+    def __hash__(self):
+        """ Return the precomputed hash. """
+        return self._hash
+
+    def __eq__(self, other):
+        """ Compare base fields of frozen addresses. """
+        if not isinstance(other, FrozenAddress):
+            return NotImplemented
+        return self._hash == other._hash and self.values() == other.values()
+
+    def __ne__(self, other):
+        """ Required by Python 2. """
+        equal = self.__eq__(other)
+        if equal is NotImplemented:
+            return equal
+        return not equal
+
+    def __reduce__(self):
+        """ Pickle frozen addresses from their values. """
+        return (self.__class__, self.values())
+
+    def __repr__(self):
+        """ Print all base fields. """
+        return '{}({})'.format(self.__class__.__name__, ', '.join(
+            '{}={!r}'.format(field_id, value) for field_id, value in zip(
+                NORMALIZATION_CACHE_FIELDS, self.values())))
+
+    def fingerprint(self):
+        """ Return the canonical ``Fingerprint`` of the address.
+
+        See ``address_fingerprint()``.
+        """
+        return address_fingerprint(self)
+
+    def thaw(self, address_class=Address):
+        """ Return a mutable address with the same base fields.
+
+        Fields are trusted to be normalized, see ``from_normalized()``.
+        """
+        return address_class.from_normalized(*self.values())
+
+
+# Canonical identity of an address: a fixed-width binary digest of all its
+# base fields, and a coarse key of its territory and postal code to group
+# similar addresses.
+Fingerprint = namedtuple('Fingerprint', ['digest', 'blocking_key'])
+
+# Version of the canonical form of addresses hashed by ``fingerprint()``.
+FINGERPRINT_VERSION = 1
+
+# Size of fingerprint digests, in bytes.
+FINGERPRINT_SIZE = 16
+
+# Separates fields in the canonical form of addresses. This is a whitespace,
+# so it is never found in canonical field values.
+FINGERPRINT_SEPARATOR = '\x1f'
+
+# Compiled renderers of address blocks, by country code. Countries without
+# renderer use ``render_default()``. See ``register_render_template()``.
+RENDERERS = {}
+
+
 # Address utils.
 
+def casefold(text):
+    """ Return a case-insensitive version of a string. """
+    if PY2:
+        return text.lower()
+    return text.casefold()
+
+
+def canonical_territory_code(territory_code):
+    """ Resolve a territory code, keeping unrecognized codes as-is. """
+    if not territory_code:
+        return ''
+    try:
+        return normalize_territory_code(territory_code)
+    except ValueError:
+        return territory_code.strip().upper()
+
+
+def address_fingerprint(address):
+    """ Return the canonical fingerprint of an address.
+
+    Free-form fields are case-folded and their whitespaces normalized, and
+    territory codes are resolved. Fingerprints are meant for indexing and
+    deduplication of normalized addresses.
+
+    :param address: Any address, including ``FrozenAddress``.
+    :return: A ``Fingerprint`` made of a ``FINGERPRINT_SIZE`` bytes digest of
+    all base fields, and a blocking key of country, subdivision and postal
+    code.
+    """
+    country_code = canonical_territory_code(address.country_code)
+    subdivision_code = canonical_territory_code(address.subdivision_code)
+    # Separators of postal codes are not significant.
+    postal_code = (normalize_postal_code(address.postal_code) or '').replace(
+        ' ', '').replace('-', '')
+    canonical_form = FINGERPRINT_SEPARATOR.join([
+        '{}'.format(FINGERPRINT_VERSION),
+        ' '.join(casefold(address.line1 or '').split()),
+        ' '.join(casefold(address.line2 or '').split()),
+        postal_code,
+        ' '.join(casefold(address.city_name or '').split()),
+        country_code,
+        subdivision_code])
+    digest = hashlib.sha256(
+        canonical_form.encode('utf-8')).digest()[:FINGERPRINT_SIZE]
+    blocking_key = '{}|{}|{}'.format(
+        country_code, subdivision_code, postal_code)
+    return Fingerprint(digest, blocking_key)
+
+
+def address_fingerprints(addresses):
+    """ Batch version of ``address_fingerprint()``.
+
+    :param addresses: An iterable of addresses.
+    :return: A list of ``Fingerprint``.
+    """
+    return [address_fingerprint(address) for address in addresses]
+
+
+def render_default(address, separator='\n'):
+    """ Render an address block with the default layout.
+
+    The block is composed of:
+    * The ``line1`` field rendered as-is if not empty.
+    * The ``line2`` field rendered as-is if not empty.
+    * A third line made of the postal code, the city name and state name if
+      any is set.
+    * A fourth optionnal line with the subdivision name if its value does
+      not overlap with the city, state or country name.
+    * The last line feature country's common name.
+    """
+    lines = []
+
+    if address.line1:
+        lines.append(address.line1)
+
+    if address.line2:
+        lines.append(address.line2)
+
+    # Build the third line.
+    city_name = address.city_name
+    state_name = address._lookup('state_name')
+    line3 = city_name or ''
+    if state_name is not None:
+        # XXX It might not be a good idea to deduplicate state and city.
+        # See: https://en.wikipedia.org/wiki
+        # /List_of_U.S._cities_named_after_their_state
+        # Separate city and state by a comma.
+        line3 = '{}, {}'.format(line3, state_name) if line3 else state_name
+    if address.postal_code:
+        # Separate the leading zip code and the rest by a dash.
+        line3 = '{} - {}'.format(address.postal_code, line3)
+    if line3:
+        lines.append(line3)
+
+    # Compare the vanilla subdivision name to city, state and country names.
+    # If none overlap, then print an additional line with the subdivision
+    # name as-is to provide extra, non-redundant, territory precision.
+    country_name = address.country_name
+    subdivision_name = address.subdivision_name
+    if subdivision_name and \
+            subdivision_name not in (city_name, state_name, country_name):
+        lines.append(subdivision_name)
+
+    # Place the country line at the end.
+    if country_name:
+        lines.append(country_name)
+
+    # Render the address block with the provided separator.
+    return separator.join(lines)
+
+
+def compile_render_template(template):
+    """ Compile a layout template into a renderer.
+
+    A template is a sequence of lines. Each line, and each of its items, is
+    either a field ID, or a ``(separator, items)`` tuple joining the non-empty
+    values of its items with the separator. Empty lines are skipped.
+
+    Field IDs are base fields, subdivision metadata like ``state_name``, or
+    address properties like ``country_name`` and ``subdivision_name``.
+
+    :return: A function rendering an address with a line separator, with the
+    same signature as ``render_default()``.
+    """
+    lines = [_compile_template_item(item) for item in template]
+
+    def render(address, separator='\n'):
+        """ Render an address block with a compiled template. """
+        return separator.join(
+            [value for value in [line(address) for line in lines] if value])
+
+    return render
+
+
+def _compile_template_item(item):
+    """ Compile an item of a layout template into a function returning its
+    value for an address. """
+    if isinstance(item, basestring):
+        # Resolve once whether the field is an attribute or metadata.
+        if item in BaseAddress.BASE_FIELD_IDS or isinstance(
+                getattr(BaseAddress, item, None), property):
+            return attrgetter(item)
+        return methodcaller('_lookup', item)
+
+    if not (isinstance(item, tuple) and len(item) == 2 and
+            isinstance(item[0], basestring) and
+            not isinstance(item[1], basestring)):
+        raise ValueError('{!r} is not a valid template item.'.format(item))
+    separator, items = item
+    getters = [_compile_template_item(sub_item) for sub_item in items]
+
+    def join(address):
+        """ Join non-empty values of items. """
+        return separator.join([
+            value for value in [getter(address) for getter in getters]
+            if value])
+
+    return join
+
+
+def register_render_template(country_code, template):
+    """ Set the layout of address blocks of a country.
+
+    :param country_code: A supported country code.
+    :param template: A layout template, see ``compile_render_template()``, or
+    ``None`` to restore the default layout.
+    """
+    if country_code not in supported_country_codes():
+        raise ValueError(
+            '{!r} is not a supported country code.'.format(country_code))
+    if template is None:
+        RENDERERS.pop(country_code, None)
+    else:
+        RENDERERS[country_code] = compile_render_template(template)
+
+
+def render_many(addresses, separator='\n'):
+    """ Batch version of ``BaseAddress.render()``.
+
+    :param addresses: An iterable of addresses.
+    :return: A list of rendered address blocks.
+    """
+    renderers = RENDERERS
+    return [
+        renderers.get(address.country_code, render_default)(
+            address, separator)
+        for address in addresses]
+
+
+def normalize_postal_code(postal_code):
+    """ Normalize a postal code.
+
+    Postal codes are upper-cased and stripped of any characters but
+    alphanumerics, spaces and hyphens. Sequences of spaces and hyphens are
+    reduced to a single separator.
+
+    :param postal_code: A raw postal code string, or ``None``.
+    :return: The normalized postal code, or ``None`` if it ends up empty.
+    """
+    if not postal_code:
+        return None
+    # Remove unrecognized characters.
+    postal_code = POSTAL_CODE_INVALID_CHARS.sub('', postal_code.upper())
+    # Reduce sequences of mixed hyphens and spaces to single hyphen.
+    if '-' in postal_code:
+        postal_code = POSTAL_CODE_HYPHENS.sub('-', postal_code)
+        # Edge case: remove leading and trailing hyphens and spaces.
+        postal_code = postal_code.strip('-')
+    return ' '.join(postal_code.split()) or None
+
+
+def normalize_postal_codes(postal_codes):
+    """ Batch version of ``normalize_postal_code()``.
+
+    Each distinct postal code is only normalized once.
+
+    :param postal_codes: An iterable of raw postal codes, or a NumPy array.
+    :return: A list of normalized postal codes, or a NumPy array of objects if
+    ``postal_codes`` is one.
+    """
+    normalized = {}
+    results = []
+    for postal_code in postal_codes:
+        try:
+            result = normalized[postal_code]
+        except KeyError:
+            result = normalized[postal_code] = normalize_postal_code(
+                postal_code)
+        results.append(result)
+
+    numpy = sys.modules.get('numpy')
+    if numpy is not None and isinstance(postal_codes, numpy.ndarray):
+        return numpy.array(results, dtype=object)
+    return results
+
+
 def random_address(locale=None):
     """ Return a random, valid address.
 
     A ``locale`` parameter try to produce a localized-consistent address. Else
     a random locale is picked-up.
+
+    Requires the optional ``Faker`` dependency, available through the
+    ``faker`` extra: ``pip install postal-address[faker]``.
     """
+    # Faker is slow to import and only needed here.
+    import faker
+
     # XXX Exclude 'ar_PS' that doesn't work currently (it's defined in Faker
     # but not in pycountry).
     # See: https://github.com/scaleway/postal-address/issues/20
@@ -696,8 +1483,15 @@ def subdivision_type_id(subdivision):
         zone
 
     This method transform and normalize any of these into Python-friendly IDs.
+    Results are memoized per type name.
     """
-    type_id = slugify(subdivision.type)
+    return _subdivision_type_id(subdivision.type)
+
+
+@cached(LRI(max_size=SUBDIVISION_CACHE_SIZE))
+def _subdivision_type_id(type_name):
+    """ Uncached implementation of ``subdivision_type_id()``. """
+    type_id = slugify(type_name)
 
     # Any occurence of the 'city' or 'municipality' string in the type
     # overrides its classification to a city.
@@ -707,10 +1501,92 @@ def subdivision_type_id(subdivision):
     return type_id
 
 
+def resolve_territory(country_code, subdivision_code):
+    """ Normalize the territory codes of an address.
+
+    Unrecognized territory codes are reset to ``None``. Countries having a
+    default subdivision are replaced by it.
+
+    :param country_code: A raw country code, or ``None``.
+    :param subdivision_code: A raw subdivision code, or ``None``.
+    :return: A tuple of the normalized country code, the normalized
+    subdivision code, and the metadata derived from the subdivision and its
+    parents (or ``None`` if there is no subdivision).
+    """
+    country_code = _resolve_territory_code(country_code)
+    subdivision_code = _resolve_territory_code(subdivision_code)
+
+    # Try to set default subdivision from country if not set.
+    if country_code and not subdivision_code:
+        subdivision_code = default_subdivision_code(country_code)
+        # If the country set its own subdivision, reset it. It will be
+        # properly re-guessed from the subdivision metadata.
+        if subdivision_code:
+            country_code = None
+
+    if not subdivision_code:
+        return country_code, subdivision_code, None
+    return (
+        country_code, subdivision_code,
+        subdivision_parents_metadata(subdivision_code))
+
+
+def _resolve_territory_code(territory_code):
+    """ Normalize a raw territory code, without resolving aliases.
+
+    Unrecognized territory codes are reset to ``None``.
+    """
+    if not territory_code:
+        return territory_code
+    try:
+        return normalize_territory_code(territory_code, resolve_aliases=False)
+    except ValueError:
+        return None
+
+
+@cached(LRI(max_size=SUBDIVISION_CACHE_SIZE))
+def subdivision_parents_metadata(subdivision_code):
+    """ Return metadata derived from a subdivision and all its parents.
+
+    Includes the ``country_code`` of the subdivision. Results are memoized.
+
+    :return: A read-only dictionary.
+    """
+    metadata = {
+        # All subdivisions have a parent country.
+        'country_code': country_from_subdivision(subdivision_code)}
+
+    # Add metadata of each subdivision parent.
+    for parent_subdiv in territory_parents(
+            subdivision_code, include_country=False):
+        metadata.update(subdivision_metadata(parent_subdiv))
+
+    return FrozenDict(metadata)
+
+
+@cached(LRI(max_size=SUBDIVISION_CACHE_SIZE))
+def subdivision_derived_metadata(subdivision_code):
+    """ Return metadata derived from a subdivision and all its parents, but
+    not colliding with base address fields.
+
+    Results are memoized.
+
+    :return: A read-only dictionary.
+    """
+    return FrozenDict(
+        (field_id, value) for field_id, value in subdivision_parents_metadata(
+            subdivision_code).items()
+        if field_id not in BaseAddress.BASE_FIELD_IDS)
+
+
+@cached(LRI(max_size=SUBDIVISION_CACHE_SIZE))
 def subdivision_metadata(subdivision):
     """ Return a serialize dict of subdivision metadata.
 
-    Metadata IDs are derived from subdivision type.
+    Metadata IDs are derived from subdivision type. Results are memoized per
+    subdivision.
+
+    :return: A read-only dictionary.
     """
     subdiv_type_id = subdivision_type_id(subdivision)
     metadata = {
@@ -727,4 +1603,4 @@ def subdivision_metadata(subdivision):
         Address.SUBDIVISION_METADATA_WHITELIST).issubset(
             Address.BASE_FIELD_IDS)
 
-    return metadata
+    return FrozenDict(metadata)
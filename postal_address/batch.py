@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2013-2018 Scaleway and Contributors. All Rights Reserved.
+#                         Kevin Deldycke <kdeldycke@scaleway.com>
+#
+# Licensed under the BSD 2-Clause License (the "License"); you may not use this
+# file except in compliance with the License. You may obtain a copy of the
+# License at http://opensource.org/licenses/BSD-2-Clause
+
+u""" Normalization of large streams of addresses.
+
+This is the fast path for ETL jobs: rows are consumed and normalized lazily, so
+inputs like database cursors or CSV readers never need to fit in memory.
+
+Large inputs can be spread over several processes with
+``normalize_parallel()``.
+
+.. data:: TERRITORY_CACHE_SIZE
+
+    Default number of territory resolutions cached by ``normalize_many()``, and
+    by each worker of ``normalize_parallel()``.
+
+.. data:: CHUNK_SIZE
+
+    Default number of rows sent at once to a worker by
+    ``normalize_parallel()``.
+"""
+
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals
+)
+
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from multiprocessing import cpu_count
+
+from .address import CompactAddress, InvalidAddress
+from .cache import MemoCache
+from .territory import territory_data
+
+# Outcome of the normalization of a row. ``fields`` is a dict of normalized
+# base fields, and ``error`` the exception raised by the row. Exactly one of
+# them is ``None``.
+NormalizedRow = namedtuple('NormalizedRow', ['index', 'fields', 'error'])
+
+TERRITORY_CACHE_SIZE = 4096
+
+CHUNK_SIZE = 1000
+
+
+def normalize_many(rows, strict=True, validate=True,
+                   territory_cache_size=TERRITORY_CACHE_SIZE):
+    """ Normalize a stream of addresses.
+
+    Rows are processed with the same semantics as ``Address(strict=strict,
+    **row)`` followed by ``validate()``, but territory resolution is cached
+    for the whole stream, and no address object is kept around.
+
+    :param rows: An iterable of mappings of base field IDs to values.
+    :param strict: Normalization mode, see ``Address.normalize()``.
+    :param validate: Report invalid addresses as errors.
+    :param territory_cache_size: Maximum number of distinct pairs of raw
+    country and subdivision codes to keep resolved.
+    :return: A generator of ``NormalizedRow``, in the order of ``rows``.
+    Unknown fields, non-string values and invalid addresses are reported in
+    the ``error`` attribute as ``KeyError``, ``TypeError`` and
+    ``InvalidAddress`` respectively.
+    """
+    territory_cache = MemoCache(max_size=territory_cache_size)
+    return _normalize_rows(rows, strict, validate, territory_cache)
+
+
+def _normalize_rows(rows, strict, validate, territory_cache, start=0):
+    """ Implementation of ``normalize_many()``.
+
+    :param territory_cache: The ``MemoCache`` of resolved territories.
+    :param start: Index of the first row.
+    """
+    # A single address is recycled to hold each row in turn.
+    address = CompactAddress()
+    field_ids = sorted(address.BASE_FIELD_IDS)
+    for index, row in enumerate(rows, start):
+        try:
+            address._load_fields(row)
+            address.normalize(strict=strict, territory_cache=territory_cache)
+        except (KeyError, TypeError, InvalidAddress) as exception:
+            yield NormalizedRow(index, None, exception)
+            continue
+        if validate:
+            # Invalid rows are common, so spare the cost of raising.
+            result = address.check()
+            if not result.valid:
+                yield NormalizedRow(index, None, result.exception())
+                continue
+        yield NormalizedRow(
+            index,
+            {field_id: getattr(address, field_id) for field_id in field_ids},
+            None)
+
+
+# Territory cache of the current worker process, shared by all the chunks it
+# normalizes.
+_worker_territory_cache = None
+
+
+def _normalize_chunk(start, rows, strict, validate, territory_cache_size):
+    """ Normalize a chunk of rows in a worker process.
+
+    :return: The list of ``NormalizedRow`` of the chunk.
+    """
+    global _worker_territory_cache
+    if _worker_territory_cache is None:
+        # Load territory data once per worker, not per chunk.
+        territory_data()
+        _worker_territory_cache = MemoCache(max_size=territory_cache_size)
+    return list(_normalize_rows(
+        rows, strict, validate, _worker_territory_cache, start))
+
+
+def normalize_parallel(rows, strict=True, validate=True, workers=None,
+                       chunk_size=CHUNK_SIZE, max_pending=None,
+                       territory_cache_size=TERRITORY_CACHE_SIZE):
+    """ Normalize a stream of addresses in a pool of processes.
+
+    Rows are split in chunks normalized by ``normalize_many()`` in worker
+    processes. Results are the same and come in the same order as with
+    ``normalize_many()``.
+
+    :param rows: An iterable of mappings of base field IDs to values. Values
+    must be picklable.
+    :param strict: Normalization mode, see ``Address.normalize()``.
+    :param validate: Report invalid addresses as errors.
+    :param workers: Number of worker processes. Defaults to the number of
+    CPUs.
+    :param chunk_size: Number of rows sent at once to a worker.
+    :param max_pending: Maximum number of chunks being processed or waiting to
+    be consumed, which bounds memory usage. Defaults to twice the number of
+    workers.
+    :param territory_cache_size: Size of the territory cache of each worker.
+    :return: A generator of ``NormalizedRow``, in the order of ``rows``.
+    """
+    if chunk_size < 1:
+        raise ValueError('Chunk size must be positive.')
+    workers = workers or cpu_count()
+    if max_pending is None:
+        max_pending = 2 * workers
+    rows = iter(rows)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        start = 0
+        while True:
+            # Keep the pool busy, within the limit of pending chunks.
+            while len(pending) < max(max_pending, 1):
+                chunk = list(islice(rows, chunk_size))
+                if not chunk:
+                    break
+                pending.append(executor.submit(
+                    _normalize_chunk, start, chunk, strict, validate,
+                    territory_cache_size))
+                start += len(chunk)
+            if not pending:
+                break
+            for result in pending.popleft().result():
+                yield result
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2013-2018 Scaleway and Contributors. All Rights Reserved.
+#                         Kevin Deldycke <kdeldycke@scaleway.com>
+#
+# Licensed under the BSD 2-Clause License (the "License"); you may not use this
+# file except in compliance with the License. You may obtain a copy of the
+# License at http://opensource.org/licenses/BSD-2-Clause
+
+u""" Bounded caches used to memoize normalization steps.
+
+On top of the hit and miss counters of ``boltons.cacheutils`` caches, these
+also count evictions and expirations, and can be resized, so one can tune them
+against real-world traffic.
+"""
+
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals
+)
+
+import time
+from collections import OrderedDict
+from threading import RLock
+
+DEFAULT_MAX_SIZE = 1024
+
+
+class MemoCache(object):
+
+    """ Least-recently-used cache with hit, miss and eviction counters.
+
+    Once ``max_size`` items are stored, adding a new one evicts the least
+    recently accessed item. A ``max_size`` of ``0`` disables the cache.
+
+    If ``ttl`` is set, items expire that many seconds after being cached, as
+    measured by ``timer``.
+
+    All operations are guarded by a lock, so a cache can be shared between
+    threads.
+    """
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE, ttl=None, timer=time.time):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.timer = timer
+        # Values are stored along with their expiration time.
+        self._items = OrderedDict()
+        self._lock = RLock()
+        self.hit_count = 0
+        self.miss_count = 0
+        self.eviction_count = 0
+        self.expiration_count = 0
+
+    def __len__(self):
+        """ Return the number of cached items. """
+        return len(self._items)
+
+    def __contains__(self, key):
+        """ Check presence of a key without affecting counters. """
+        return key in self._items
+
+    def get(self, key, default=None):
+        """ Return the cached value of ``key``, else ``default``. """
+        with self._lock:
+            try:
+                value, expiration = self._items.pop(key)
+            except KeyError:
+                self.miss_count += 1
+                return default
+            if expiration is not None and self.timer() >= expiration:
+                self.expiration_count += 1
+                self.miss_count += 1
+                return default
+            # Re-insert the item to mark it as the most recently used.
+            self._items[key] = (value, expiration)
+            self.hit_count += 1
+            return value
+
+    def set(self, key, value):
+        """ Cache ``value`` under ``key``, evicting old items if needed. """
+        if self.max_size <= 0:
+            return
+        expiration = None
+        if self.ttl is not None:
+            expiration = self.timer() + self.ttl
+        with self._lock:
+            self._items.pop(key, None)
+            self._items[key] = (value, expiration)
+            self._evict()
+
+    def _evict(self):
+        """ Drop least recently used items until under the size limit.
+
+        Must be called with the lock held.
+        """
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+            self.eviction_count += 1
+
+    def resize(self, max_size):
+        """ Change the size limit, evicting items if needed. """
+        with self._lock:
+            self.max_size = max_size
+            self._evict()
+
+    def clear(self):
+        """ Empty the cache and reset its counters. """
+        with self._lock:
+            self._items.clear()
+            self.hit_count = 0
+            self.miss_count = 0
+            self.eviction_count = 0
+            self.expiration_count = 0
+
+    def info(self):
+        """ Return a dict of cache statistics. """
+        with self._lock:
+            lookups = self.hit_count + self.miss_count
+            return {
+                'size': len(self._items),
+                'max_size': self.max_size,
+                'hits': self.hit_count,
+                'misses': self.miss_count,
+                'evictions': self.eviction_count,
+                'expirations': self.expiration_count,
+                'ttl': self.ttl,
+                'hit_rate': self.hit_count / lookups if lookups else 0.0}
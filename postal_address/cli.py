@@ -0,0 +1,347 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2013-2018 Scaleway and Contributors. All Rights Reserved.
+#                         Kevin Deldycke <kdeldycke@scaleway.com>
+#
+# Licensed under the BSD 2-Clause License (the "License"); you may not use this
+# file except in compliance with the License. You may obtain a copy of the
+# License at http://opensource.org/licenses/BSD-2-Clause
+
+u""" ``postal-address`` command line batch normalizer.
+
+Reads addresses from CSV or JSON Lines files (or standard input), normalizes
+and validates them, and writes them back in the same format. Records are
+streamed, so memory usage doesn't depend on the size of inputs.
+
+Columns named after address fields are picked automatically, others can be
+mapped with ``--column``. Any other column is copied as-is. CSV outputs have
+the columns of all inputs. Rejected records are written, with the reason of
+their rejection in an extra ``_error`` column, to the file provided with
+``--rejects``, or dropped otherwise. Malformed JSON lines are rejected as-is,
+in a ``_raw`` column. JSON numbers are normalized as strings.
+"""
+
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals
+)
+
+import argparse
+import csv
+import io
+import json
+import numbers
+import os
+import sys
+import time
+from collections import deque, namedtuple
+from itertools import chain
+
+from . import PY2, __version__
+from .address import Address
+from .batch import CHUNK_SIZE, normalize_many, normalize_parallel
+
+FORMATS = ('csv', 'jsonl')
+
+# File extensions of JSON Lines files. Anything else is considered CSV.
+JSONL_EXTENSIONS = frozenset(['.jsonl', '.ndjson', '.json'])
+
+# Column holding the reason of rejection of a record.
+ERROR_COLUMN = '_error'
+
+# Column holding the raw content of malformed records.
+RAW_COLUMN = '_raw'
+
+# Line of a JSON Lines input which is not a valid record.
+MalformedRecord = namedtuple('MalformedRecord', ['raw', 'error'])
+
+
+def guess_format(path):
+    """ Guess the format of a file from its extension. """
+    if os.path.splitext(path)[1].lower() in JSONL_EXTENSIONS:
+        return 'jsonl'
+    return 'csv'
+
+
+def open_stream(path, mode):
+    """ Open a file, or standard input or output if ``path`` is ``-``.
+
+    Python 2 ``csv`` module only works on byte streams, so streams are opened
+    in binary mode there.
+    """
+    closefd = True
+    if path == '-':
+        path = (sys.stdin if mode == 'r' else sys.stdout).fileno()
+        closefd = False
+    if PY2:
+        return io.open(path, mode + 'b', closefd=closefd)
+    return io.open(
+        path, mode, encoding='utf-8', newline='', closefd=closefd)
+
+
+def read_json_lines(stream):
+    """ Generate records of a JSON Lines stream.
+
+    Lines not holding a JSON object are generated as ``MalformedRecord``.
+    """
+    for line in stream:
+        if PY2:
+            line = line.decode('utf-8')
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exception:
+            yield MalformedRecord(
+                line.rstrip('\r\n'), 'Malformed JSON: {}'.format(exception))
+            continue
+        if not isinstance(record, dict):
+            yield MalformedRecord(
+                line.rstrip('\r\n'), 'Not a JSON object.')
+            continue
+        yield record
+
+
+def read_records(stream, data_format):
+    """ Return the columns and a generator of records of a stream.
+
+    Columns are ``None`` for JSON Lines.
+    """
+    if data_format == 'jsonl':
+        return None, read_json_lines(stream)
+
+    reader = csv.DictReader(stream)
+    columns = reader.fieldnames or []
+    if PY2:
+        columns = [column.decode('utf-8') for column in columns]
+        records = (
+            {key.decode('utf-8'): value.decode('utf-8')
+             for key, value in record.items()}
+            for record in reader)
+        return columns, records
+    return columns, reader
+
+
+def record_writer(stream, data_format, columns):
+    """ Return a function writing records to a stream. """
+    if data_format == 'jsonl':
+        def write(record):
+            line = json.dumps(record, ensure_ascii=False) + '\n'
+            stream.write(line.encode('utf-8') if PY2 else line)
+        return write
+
+    if PY2:
+        columns = [column.encode('utf-8') for column in columns]
+    writer = csv.DictWriter(stream, columns, extrasaction='ignore')
+    writer.writeheader()
+    if PY2:
+        def write_encoded(record):
+            writer.writerow({
+                key.encode('utf-8'): value.encode('utf-8')
+                if value is not None else value
+                for key, value in record.items()})
+        return write_encoded
+    return writer.writerow
+
+
+def column_mapping(mappings):
+    """ Map base field IDs to columns.
+
+    :param mappings: List of ``FIELD=COLUMN`` strings, overriding the default
+    mapping of each base field to the column of the same name.
+    """
+    mapping = {field_id: field_id for field_id in Address.BASE_FIELD_IDS}
+    for item in mappings or []:
+        field_id, _, column = item.partition('=')
+        if field_id not in Address.BASE_FIELD_IDS or not column:
+            raise ValueError(
+                "{!r} is not a valid field mapping.".format(item))
+        mapping[field_id] = column
+    return mapping
+
+
+def parse_args(args=None):
+    """ Parse command line arguments. """
+    parser = argparse.ArgumentParser(
+        prog='postal-address',
+        description="Normalize and validate addresses from CSV or JSON Lines "
+        "files.")
+    parser.add_argument(
+        'inputs', metavar='INPUT', nargs='*', default=['-'],
+        help="CSV or JSON Lines files. Defaults to standard input.")
+    parser.add_argument(
+        '-f', '--format', choices=FORMATS,
+        help="Format of inputs and outputs. Guessed from the extension of the "
+        "first input by default, else CSV.")
+    parser.add_argument(
+        '-o', '--output', default='-',
+        help="Destination of normalized records. Defaults to standard "
+        "output.")
+    parser.add_argument(
+        '-r', '--rejects',
+        help="Destination of rejected records. Dropped by default.")
+    parser.add_argument(
+        '-c', '--column', action='append', metavar='FIELD=COLUMN',
+        help="Read address field FIELD from COLUMN. Can be repeated. Fields "
+        "are one of: {}.".format(', '.join(sorted(Address.BASE_FIELD_IDS))))
+    parser.add_argument(
+        '--no-strict', dest='strict', action='store_false',
+        help="Let subdivision metadata override address fields.")
+    parser.add_argument(
+        '--no-validate', dest='validate', action='store_false',
+        help="Only reject records failing normalization.")
+    parser.add_argument(
+        '-w', '--workers', type=int, default=1,
+        help="Number of worker processes. 0 uses all CPUs. Defaults to 1.")
+    parser.add_argument(
+        '--chunk-size', type=int, default=CHUNK_SIZE,
+        help="Number of records sent at once to a worker. Defaults to "
+        "{}.".format(CHUNK_SIZE))
+    parser.add_argument(
+        '-s', '--stats', action='store_true',
+        help="Report progress and throughput on standard error.")
+    parser.add_argument(
+        '--stats-interval', type=float, default=10, metavar='SECONDS',
+        help="Delay between progress reports. Defaults to 10 seconds.")
+    parser.add_argument(
+        '--version', action='version',
+        version='%(prog)s {}'.format(__version__))
+
+    options = parser.parse_args(args)
+    try:
+        options.mapping = column_mapping(options.column)
+    except ValueError as exception:
+        parser.error('{}'.format(exception))
+    if options.workers < 0:
+        parser.error('Number of workers must be positive.')
+    if options.chunk_size < 1:
+        parser.error('Chunk size must be positive.')
+    options.format = options.format or guess_format(options.inputs[0])
+    return options
+
+
+def report(processed, rejected, start_time, final=False):
+    """ Print progress and throughput on standard error. """
+    elapsed = time.time() - start_time
+    print("{} {} records ({} rejected) in {:.1f}s: {:.0f} rows/s.".format(
+        'Processed' if final else 'Processing...', processed, rejected,
+        elapsed, processed / elapsed if elapsed else 0), file=sys.stderr)
+
+
+def json_field_value(value):
+    """ Convert JSON numbers, like postal codes, to strings.
+
+    Other values are left untouched, to be rejected on normalization if not
+    strings.
+    """
+    if isinstance(value, numbers.Number) and not isinstance(value, bool):
+        return '{}'.format(value)
+    return value
+
+
+def main(args=None):
+    """ Normalize records from the command line. """
+    options = parse_args(args)
+    mapping = options.mapping
+
+    streams = [open_stream(path, 'r') for path in options.inputs]
+    inputs = [read_records(stream, options.format) for stream in streams]
+    records = chain(*[input_records for _, input_records in inputs])
+    columns = None
+    if options.format == 'csv':
+        # Keep the columns of all inputs, in order of appearance.
+        columns = []
+        for input_columns, _ in inputs:
+            columns.extend(
+                column for column in input_columns if column not in columns)
+
+    output = open_stream(options.output, 'w')
+    rejects = open_stream(options.rejects, 'w') if options.rejects else None
+    if columns is not None:
+        # Normalization may set fields missing from inputs.
+        columns = columns + [
+            mapping[field_id] for field_id in sorted(mapping)
+            if mapping[field_id] not in columns]
+    write_output = record_writer(output, options.format, columns)
+    write_rejects = rejects and record_writer(
+        rejects, options.format, columns and columns + [ERROR_COLUMN])
+
+    # Records are kept until their normalization is over. Their number is
+    # bounded by the chunks being processed.
+    originals = deque()
+
+    def address_fields():
+        """ Extract address fields from records. """
+        for record in records:
+            originals.append(record)
+            # Malformed records are not normalized, but kept in order.
+            if isinstance(record, MalformedRecord):
+                continue
+            yield {
+                field_id: json_field_value(record[column])
+                for field_id, column in mapping.items() if column in record}
+
+    if options.workers == 1:
+        results = normalize_many(
+            address_fields(), strict=options.strict,
+            validate=options.validate)
+    else:
+        results = normalize_parallel(
+            address_fields(), strict=options.strict,
+            validate=options.validate, workers=options.workers or None,
+            chunk_size=options.chunk_size)
+
+    def reject_malformed():
+        """ Reject the malformed records preceding the next normalized one.
+
+        :return: The number of rejected records.
+        """
+        count = 0
+        while originals and isinstance(originals[0], MalformedRecord):
+            malformed = originals.popleft()
+            count += 1
+            if write_rejects:
+                write_rejects({
+                    RAW_COLUMN: malformed.raw, ERROR_COLUMN: malformed.error})
+        return count
+
+    processed = rejected = 0
+    start_time = last_report = time.time()
+    try:
+        for result in results:
+            malformed_count = reject_malformed()
+            processed += malformed_count
+            rejected += malformed_count
+            record = originals.popleft()
+            processed += 1
+            if result.error is None:
+                for field_id, column in mapping.items():
+                    record[column] = result.fields[field_id]
+                write_output(record)
+            else:
+                rejected += 1
+                if write_rejects:
+                    # Some exceptions, like TypeError, have no message.
+                    record[ERROR_COLUMN] = '{}'.format(
+                        result.error) or type(result.error).__name__
+                    write_rejects(record)
+            if options.stats and \
+                    time.time() - last_report >= options.stats_interval:
+                last_report = time.time()
+                report(processed, rejected, start_time)
+        malformed_count = reject_malformed()
+        processed += malformed_count
+        rejected += malformed_count
+    finally:
+        for stream in streams + [output, rejects]:
+            if stream is not None:
+                stream.close()
+
+    if options.stats:
+        report(processed, rejected, start_time, final=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2013-2018 Scaleway and Contributors. All Rights Reserved.
+#                         Kevin Deldycke <kdeldycke@scaleway.com>
+#
+# Licensed under the BSD 2-Clause License (the "License"); you may not use this
+# file except in compliance with the License. You may obtain a copy of the
+# License at http://opensource.org/licenses/BSD-2-Clause
+
+u""" Compiled snapshot of territory data, for fast cold starts.
+
+Territory utilities need tables and indexes extracted from the whole
+pycountry databases before answering anything. To skip that step, territory
+data can be compiled ahead of time into a single binary file, loaded at first
+use::
+
+    $ python -m postal_address.snapshot
+
+The snapshot is ignored (and pycountry consulted instead) if it is missing,
+corrupted, or was built from other sources than the ones currently installed.
+In which case ``territory_data()`` only rebuilds it at the location explicitly
+set with ``SNAPSHOT_ENV``: the package directory is never written to at
+runtime.
+
+The snapshot only replaces codes, names, types and their relationships.
+Country and subdivision objects, including those attached to subdivision
+metadata of addresses, are still pycountry's own: the first address with a
+subdivision code loads pycountry's subdivision database.
+
+.. data:: SNAPSHOT_ENV
+
+    Name of the environment variable overriding the default snapshot location.
+
+.. data:: DEFAULT_SNAPSHOT_PATH
+
+    Default snapshot location, next to this module.
+"""
+
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals
+)
+
+import marshal
+import os
+import struct
+import sys
+import tempfile
+
+SNAPSHOT_ENV = 'POSTAL_ADDRESS_SNAPSHOT'
+
+DEFAULT_SNAPSHOT_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'territory.snapshot')
+
+# Snapshot files starts with a fixed-size header made of a magic string, the
+# format version, the major and minor version of the Python interpreter which
+# wrote it (marshal format is Python-specific), and the 20 bytes fingerprint
+# of the data sources.
+MAGIC = b'PATS'
+FORMAT_VERSION = 1
+HEADER = struct.Struct(str('<4sHBB20s'))
+
+
+def snapshot_path():
+    """ Return the location of the snapshot file. """
+    return os.environ.get(SNAPSHOT_ENV) or DEFAULT_SNAPSHOT_PATH
+
+
+def snapshot_auto_build():
+    """ Check if a missing or stale snapshot is to be rebuilt at first use.
+
+    Only applies to writable locations set with ``SNAPSHOT_ENV``.
+    """
+    path = os.environ.get(SNAPSHOT_ENV)
+    return bool(path) and os.access(
+        os.path.dirname(os.path.abspath(path)), os.W_OK)
+
+
+def _header(fingerprint):
+    """ Return the expected header for the provided fingerprint. """
+    return HEADER.pack(
+        MAGIC, FORMAT_VERSION, sys.version_info[0], sys.version_info[1],
+        fingerprint)
+
+
+def write_snapshot(data, fingerprint, path=None):
+    """ Serialize ``data`` to a snapshot file.
+
+    The file is written atomically, so concurrent readers never see a partial
+    snapshot.
+
+    :param data: Territory data made of built-in types only.
+    :param fingerprint: Digest of the sources ``data`` was compiled from.
+    :param path: Snapshot location. Defaults to ``snapshot_path()``.
+    :return: The path of the written snapshot.
+    """
+    path = path or snapshot_path()
+    file_descriptor, temp_path = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(file_descriptor, 'wb') as snapshot:
+            snapshot.write(_header(fingerprint))
+            snapshot.write(marshal.dumps(data))
+        os.chmod(temp_path, 0o644)
+        getattr(os, 'replace', os.rename)(temp_path, path)
+    except Exception:
+        os.remove(temp_path)
+        raise
+    return path
+
+
+def read_snapshot(fingerprint, path=None):
+    """ Load territory data from a snapshot file.
+
+    :param fingerprint: Digest of the sources the snapshot is expected to be
+    compiled from.
+    :param path: Snapshot location. Defaults to ``snapshot_path()``.
+    :return: The territory data, or ``None`` if the snapshot is missing,
+    corrupted or stale.
+    """
+    path = path or snapshot_path()
+    try:
+        with open(path, 'rb') as snapshot:
+            if snapshot.read(HEADER.size) != _header(fingerprint):
+                return None
+            payload = snapshot.read()
+    except (IOError, OSError):
+        return None
+
+    try:
+        return marshal.loads(payload)
+    except (EOFError, ValueError, TypeError):
+        return None
+
+
+def build_snapshot(path=None):
+    """ Compile territory data from pycountry and write it to a snapshot.
+
+    :param path: Snapshot location. Defaults to ``snapshot_path()``.
+    :return: The path of the written snapshot.
+    """
+    from .territory import compile_territory_data, territory_data_fingerprint
+
+    fingerprint = territory_data_fingerprint()
+    if not fingerprint:
+        raise RuntimeError("Can't locate pycountry databases.")
+    return write_snapshot(compile_territory_data(), fingerprint, path)
+
+
+def main(args=None):
+    """ Build the snapshot at the location provided as first argument. """
+    args = sys.argv[1:] if args is None else args
+    path = build_snapshot(args[0] if args else None)
+    print("Territory snapshot written to {}".format(path))
+
+
+if __name__ == '__main__':
+    main()
@@ -48,6 +48,22 @@ u""" Utilities to normalize and reconcile territory codes.
 .. data:: REVERSE_MAPPING
 
    Reverse index of the SUBDIVISION_COUNTRIES mapping defined above.
+
+.. data:: DEFAULT_SUBDIVISIONS
+
+   Read-only mapping of country codes to their default subdivision code. Only
+   countries having a 1:1 mapping with a subdivision are referenced.
+
+.. data:: TERRITORY_DATA_VERSION
+
+   Version of the structure of territory data, as produced by
+   ``compile_territory_data()``. Bumping it invalidates existing snapshots.
+
+.. data:: TERRITORY_CODE_CACHE
+
+   Memoization cache of ``normalize_territory_code()`` results, including
+   unrecognized codes. Use its ``info()``, ``resize()`` and ``clear()`` methods
+   to monitor and tune it.
 """
 
 from __future__ import (
@@ -57,19 +73,16 @@ from __future__ import (
     unicode_literals
 )
 
+import hashlib
+import os
+import sys
+from array import array
 from itertools import chain
-from operator import attrgetter
 
 from boltons.cacheutils import cached, LRI
-from pycountry import countries, subdivisions
-
-from . import PY2
+from boltons.dictutils import FrozenDict
 
-if PY2:
-    from itertools import imap, ifilter
-else:
-    imap = map
-    ifilter = filter
+from .cache import MemoCache
 
 FOREIGN_TERRITORIES_MAPPING = {
     'CC': 'AU',  # Cocos Island,                      Australian territory
@@ -192,6 +205,430 @@ def generate_mapping():
 REVERSE_MAPPING = generate_mapping()
 
 
+def generate_default_subdivisions():
+    """Build the index of default subdivision codes of countries.
+
+    :return: A read-only dictionary mapping country codes to the subdivision
+    code they are exclusively attached to.
+    """
+    # Build the reverse index of the subdivision/country alias mapping.
+    default_subdiv = {}
+    for subdiv_code, alias_code in SUBDIVISION_COUNTRIES.items():
+        # Skip non-country
+        if len(alias_code) == 2:
+            default_subdiv.setdefault(alias_code, set()).add(subdiv_code)
+
+    # Include countries directly mapping to a subdivision.
+    for alias_code, subdiv_code in COUNTRY_ALIAS_TO_SUBDIVISION.items():
+        default_subdiv.setdefault(alias_code, set()).add(subdiv_code)
+
+    # Only keep unambiguous 1:1 mappings.
+    return FrozenDict(
+        (country_code, next(iter(subdiv_codes)))
+        for country_code, subdiv_codes in default_subdiv.items()
+        if len(subdiv_codes) == 1)
+
+
+DEFAULT_SUBDIVISIONS = generate_default_subdivisions()
+
+TERRITORY_DATA_VERSION = 3
+
+
+def compile_territory_tables():
+    """ Extract from pycountry the base territory tables this module relies on.
+
+    :return: A dictionary of territory tables, made of built-in types only.
+    """
+    from pycountry import countries, subdivisions
+
+    return {
+        'country_codes': frozenset(
+            country.alpha_2 for country in countries),
+        'country_names': {
+            country.alpha_2: country.name for country in countries},
+        'country_common_names': {
+            country.alpha_2: country.common_name for country in countries
+            if hasattr(country, 'common_name')},
+        'subdivision_codes': frozenset(
+            subdiv.code for subdiv in subdivisions),
+        'subdivision_names': {
+            subdiv.code: subdiv.name for subdiv in subdivisions},
+        'subdivision_types': {
+            subdiv.code: subdiv.type for subdiv in subdivisions},
+        'subdivision_countries': {
+            subdiv.code: subdiv.country_code for subdiv in subdivisions},
+        'subdivision_parents': {
+            subdiv.code: subdiv.parent_code for subdiv in subdivisions
+            if subdiv.parent_code},
+    }
+
+
+def _children_index(data):
+    """ Index direct children of each territory in a single pass, as pycountry
+    only expose the child-parent relationship upwards. Top-level subdivisions
+    are attached to their country.
+    """
+    children_index = {}
+    for code, country_code in data['subdivision_countries'].items():
+        parent_code = data['subdivision_parents'].get(code, country_code)
+        children_index.setdefault(parent_code, set()).add(code)
+    return {code: frozenset(codes) for code, codes in children_index.items()}
+
+
+def _descendants_index(data):
+    """ Index all descendants of each territory. """
+    children_index = data['children_index']
+
+    # Countries own all subdivisions sharing their country code.
+    descendants_index = {}
+    for code, country_code in data['subdivision_countries'].items():
+        descendants_index.setdefault(country_code, set()).add(code)
+
+    # Collect sub-levels of subdivisions from the direct children index, each
+    # branch being computed only once. Children are normalized, and those
+    # aliased to a country brings all the subdivisions of the latter.
+    def collect(code):
+        if code not in descendants_index:
+            descendants = set()
+            for child_code in children_index.get(code, ()):
+                child_code = SUBDIVISION_ALIASES.get(child_code, child_code)
+                child_code = SUBDIVISION_COUNTRIES.get(child_code, child_code)
+                descendants.add(child_code)
+                descendants.update(collect(child_code))
+            descendants_index[code] = descendants
+        return descendants_index[code]
+
+    for code in data['subdivision_codes']:
+        collect(code)
+
+    return {
+        code: frozenset(codes) for code, codes in descendants_index.items()}
+
+
+def _ancestors_index(data):
+    """ Index the chain of ancestors of each territory, starting from itself up
+    to its country.
+    """
+    ancestors_index = {code: (code,) for code in data['country_codes']}
+    for code, country_code in data['subdivision_countries'].items():
+        ancestors = [code]
+        while ancestors[-1] in data['subdivision_parents']:
+            ancestors.append(data['subdivision_parents'][ancestors[-1]])
+        ancestors.append(country_code)
+        ancestors_index[code] = tuple(ancestors)
+    return ancestors_index
+
+
+def _aliases_index(data):
+    """ Index the closure of country aliases of all supported territories. """
+    country_codes = data['country_codes'].union(extra_country_codes())
+    aliases_index = {}
+
+    def _aliases_of(code):
+        if code not in aliases_index:
+            aliases = set()
+            # Add a country code right away in our aliases.
+            if code in country_codes:
+                aliases.add(code)
+            # A subdivision code triggers a walk along the non-normalized
+            # parent tree and look for aliases at each level.
+            else:
+                parent_code = data['subdivision_parents'].get(
+                    code, data['subdivision_countries'][code])
+                aliases.update(_aliases_of(parent_code))
+                # Adding subdivision's country alias
+                if code in SUBDIVISION_COUNTRIES:
+                    aliases.add(SUBDIVISION_COUNTRIES[code])
+            # Hunt for aliases
+            for mapped_code in REVERSE_MAPPING.get(code, []):
+                aliases.update(_aliases_of(mapped_code))
+            aliases_index[code] = frozenset(aliases)
+        return aliases_index[code]
+
+    for code in country_codes.union(data['subdivision_codes']):
+        _aliases_of(code)
+    return aliases_index
+
+
+# Builders of indexes derived from base territory tables.
+TERRITORY_INDEXES = {
+    'children_index': _children_index,
+    'descendants_index': _descendants_index,
+    'ancestors_index': _ancestors_index,
+    'aliases_index': _aliases_index,
+}
+
+
+class TerritoryData(dict):
+    """ Territory tables, with derived indexes built on first access. """
+
+    def __missing__(self, key):
+        if key not in TERRITORY_INDEXES:
+            raise KeyError(key)
+        return self.setdefault(key, TERRITORY_INDEXES[key](self))
+
+
+def compile_territory_data():
+    """ Extract from pycountry all territory data this module relies on.
+
+    Data is only made of built-in types so it can be serialized as-is into a
+    snapshot. See the ``postal_address.snapshot`` module.
+
+    :return: A dictionary of territory tables and all derived indexes.
+    """
+    data = TerritoryData(compile_territory_tables())
+    return {key: data[key] for key in list(data) + list(TERRITORY_INDEXES)}
+
+
+def territory_data_fingerprint():
+    """ Return a digest of all sources of territory data.
+
+    Covers the pycountry databases, the alias tables defined above and
+    ``TERRITORY_DATA_VERSION``. Returns ``None`` if pycountry databases can't
+    be located.
+    """
+    # Locate pycountry without importing it, which is slow.
+    try:
+        from importlib.util import find_spec
+    except ImportError:
+        from imp import find_module
+        package_dir = find_module('pycountry')[1]
+    else:
+        package_dir = find_spec('pycountry').submodule_search_locations[0]
+
+    sources = [TERRITORY_DATA_VERSION]
+    for filename in ['iso3166-1.json', 'iso3166-2.json']:
+        try:
+            stat = os.stat(os.path.join(package_dir, 'databases', filename))
+        except OSError:
+            return None
+        sources.append((filename, stat.st_size, int(stat.st_mtime)))
+    for mapping in [FOREIGN_TERRITORIES_MAPPING,
+                    COUNTRY_ALIASES,
+                    SUBDIVISION_COUNTRIES,
+                    SUBDIVISION_ALIASES,
+                    RESERVED_COUNTRY_CODES,
+                    COUNTRY_ALIAS_TO_SUBDIVISION]:
+        sources.append(sorted(mapping.items()))
+
+    return hashlib.sha1(repr(sources).encode('utf-8')).digest()
+
+
+@cached(LRI())
+def territory_data():
+    """ Return territory data from the snapshot if fresh, else pycountry.
+
+    On a missing or stale snapshot, only base tables are extracted from
+    pycountry, and indexes are derived on first access. Unless the snapshot
+    location is explicitly set (see ``postal_address.snapshot``): all
+    territory data is then compiled and the snapshot rebuilt, so only the
+    first cold start pays for the compilation.
+
+    See ``compile_territory_data()`` for the returned structure.
+    """
+    from .snapshot import read_snapshot, snapshot_auto_build, write_snapshot
+
+    fingerprint = territory_data_fingerprint()
+    data = None
+    if fingerprint:
+        data = read_snapshot(fingerprint)
+    if data is None:
+        if fingerprint and snapshot_auto_build():
+            data = compile_territory_data()
+            try:
+                write_snapshot(data, fingerprint)
+            except (IOError, OSError):
+                pass
+        else:
+            data = compile_territory_tables()
+    return TerritoryData(data)
+
+
+class TerritoryTable(object):
+
+    """ Dense table of all countries and subdivisions.
+
+    Each territory is identified by a small integer ID: countries first, then
+    subdivisions, both sorted by code. IDs are stable as long as the
+    underlying pycountry databases are the same.
+
+    Territory properties are stored in parallel arrays indexed by ID:
+
+    * ``parent_ids``: the parent subdivision, or the country for top-level
+      subdivisions. ``-1`` for countries.
+    * ``country_ids``: the country of the territory, itself for countries.
+    * ``type_ids``: index of the subdivision type in ``type_names``. ``-1`` for
+      countries.
+    * ``name_offsets``: boundaries of the territory name in the ``names``
+      string, which concatenates all names.
+    * ``tree_entries`` and ``tree_exits``: pre-order numbering of the
+      territory tree, so that all territories contained in another have their
+      entry number in the ``[entry, exit]`` interval of the latter. In this
+      tree, foreign territories are attached to their main country (see
+      ``FOREIGN_TERRITORIES_MAPPING``), or to the parent of the subdivision
+      aliasing them if any. Subdivisions aliased to another territory (see
+      ``SUBDIVISION_COUNTRIES`` and ``SUBDIVISION_ALIASES``) shares the
+      numbering of the latter.
+
+    Codes are expected to be normalized (see ``normalize_territory_code()``).
+    """
+
+    def __init__(self, data):
+        """ Build the table from territory data.
+
+        See ``compile_territory_data()`` for the expected structure.
+        """
+        country_codes = sorted(data['country_codes'])
+        subdivision_codes = sorted(data['subdivision_codes'])
+
+        self.country_count = len(country_codes)
+        self.codes = tuple(country_codes + subdivision_codes)
+        self.ids = {code: index for index, code in enumerate(self.codes)}
+        self.type_names = tuple(sorted(set(
+            data['subdivision_types'].values())))
+        type_ids = {
+            type_name: index for index, type_name in enumerate(
+                self.type_names)}
+
+        self.parent_ids = array(str('i'))
+        self.country_ids = array(str('i'))
+        self.type_ids = array(str('i'))
+        self.name_offsets = array(str('i'), [0])
+        names = []
+
+        for code in country_codes:
+            self.parent_ids.append(-1)
+            self.country_ids.append(self.ids[code])
+            self.type_ids.append(-1)
+            names.append(data['country_names'][code])
+
+        for code in subdivision_codes:
+            country_code = data['subdivision_countries'][code]
+            parent_code = data['subdivision_parents'].get(code, country_code)
+            self.parent_ids.append(self.ids[parent_code])
+            self.country_ids.append(self.ids[country_code])
+            self.type_ids.append(type_ids[data['subdivision_types'][code]])
+            names.append(data['subdivision_names'][code])
+
+        for name in names:
+            self.name_offsets.append(self.name_offsets[-1] + len(name))
+        self.names = ''.join(names)
+
+        self._number_tree()
+
+    def _number_tree(self):
+        """ Compute entry and exit numbers of a depth-first tree traversal.
+        """
+        # Resolve subdivision aliases to the territory they stand for.
+        aliases = [
+            self.ids.get(SUBDIVISION_COUNTRIES.get(
+                SUBDIVISION_ALIASES.get(code, code), code), index)
+            for index, code in enumerate(self.codes)]
+
+        # Countries aliased by a subdivision are attached to the parent of the
+        # latter, like in ``territory_parents_codes()`` and
+        # ``territory_children_codes()``. Subdivisions are visited in code
+        # order so the choice is stable for countries with several aliases.
+        alias_parents = {}
+        for index in range(self.country_count, len(self.codes)):
+            target = aliases[index]
+            if target != index and self.is_country(target):
+                alias_parents.setdefault(
+                    target, aliases[self.parent_ids[index]])
+
+        # Build the tree of unaliased territories.
+        children = [[] for _ in self.codes]
+        roots = []
+        for index, code in enumerate(self.codes):
+            if aliases[index] != index:
+                continue
+            if index in alias_parents:
+                parent_id = alias_parents[index]
+            elif self.is_country(index):
+                parent_id = self.ids.get(FOREIGN_TERRITORIES_MAPPING.get(code))
+            else:
+                parent_id = aliases[self.parent_ids[index]]
+            if parent_id is None:
+                roots.append(index)
+            else:
+                children[parent_id].append(index)
+
+        self.tree_entries = array(str('i'), [-1] * len(self.codes))
+        self.tree_exits = array(str('i'), [-1] * len(self.codes))
+        counter = 0
+        for root in roots:
+            stack = [(root, False)]
+            while stack:
+                index, exiting = stack.pop()
+                if exiting:
+                    self.tree_exits[index] = counter - 1
+                    continue
+                self.tree_entries[index] = counter
+                counter += 1
+                stack.append((index, True))
+                stack.extend((child, False) for child in children[index])
+
+        # Aliases share the numbering of their target.
+        for index, alias in enumerate(aliases):
+            self.tree_entries[index] = self.tree_entries[alias]
+            self.tree_exits[index] = self.tree_exits[alias]
+
+    def __len__(self):
+        """ Return the number of territories. """
+        return len(self.codes)
+
+    def code_to_id(self, code):
+        """ Return the ID of a territory code.
+
+        Raises ``KeyError`` if the code is unknown.
+        """
+        return self.ids[code]
+
+    def id_to_code(self, territory_id):
+        """ Return the code of a territory ID. """
+        return self.codes[territory_id]
+
+    def codes_to_ids(self, codes):
+        """ Convert an iterable of codes into an array of IDs.
+
+        Unknown codes are mapped to ``-1``.
+        """
+        get_id = self.ids.get
+        return array(str('i'), [get_id(code, -1) for code in codes])
+
+    def ids_to_codes(self, territory_ids):
+        """ Convert an iterable of IDs into a list of codes. """
+        codes = self.codes
+        return [codes[territory_id] for territory_id in territory_ids]
+
+    def is_within(self, territory_id, ancestor_id):
+        """ Return True if a territory is contained in, or is, the ancestor.
+        """
+        return (self.tree_entries[ancestor_id] <=
+                self.tree_entries[territory_id] <=
+                self.tree_exits[ancestor_id])
+
+    def is_country(self, territory_id):
+        """ Return True if the ID is the one of a country. """
+        return 0 <= territory_id < self.country_count
+
+    def name(self, territory_id):
+        """ Return the name of a territory. """
+        return self.names[self.name_offsets[territory_id]:
+                          self.name_offsets[territory_id + 1]]
+
+    def type_name(self, territory_id):
+        """ Return the subdivision type name, ``None`` for countries. """
+        type_id = self.type_ids[territory_id]
+        return self.type_names[type_id] if type_id >= 0 else None
+
+
+@cached(LRI())
+def territory_table():
+    """ Return the dense ``TerritoryTable`` of all territories. """
+    return TerritoryTable(territory_data())
+
+
 @cached(LRI())
 def supported_territory_codes():
     """ Return a set of recognized territory codes.
@@ -199,6 +636,15 @@ def supported_territory_codes():
     return supported_country_codes().union(supported_subdivision_codes())
 
 
+def extra_country_codes():
+    """ Return the set of recognized country codes unknown to pycountry. """
+    return set(chain(
+        # Include ISO and EC exceptions.
+        COUNTRY_ALIASES.keys(),
+        RESERVED_COUNTRY_CODES.keys(),
+        COUNTRY_ALIAS_TO_SUBDIVISION.keys()))
+
+
 @cached(LRI())
 def supported_country_codes():
     """ Return a set of recognized country codes.
@@ -207,12 +653,7 @@ def supported_country_codes():
         * ISO 3166-1 alpha-2 country codes and exceptional reservations
         * European Commision country code exceptions
     """
-    return set(chain(
-        imap(attrgetter('alpha_2'), countries),
-        # Include ISO and EC exceptions.
-        COUNTRY_ALIASES.keys(),
-        RESERVED_COUNTRY_CODES.keys(),
-        COUNTRY_ALIAS_TO_SUBDIVISION.keys()))
+    return extra_country_codes().union(territory_data()['country_codes'])
 
 
 @cached(LRI())
@@ -222,18 +663,42 @@ def supported_subdivision_codes():
     Are supported:
         * ISO 3166-2 subdivision codes
     """
-    return set(imap(attrgetter('code'), subdivisions))
+    return set(territory_data()['subdivision_codes'])
+
+
+TERRITORY_CODE_CACHE = MemoCache(max_size=1024)
 
 
 def normalize_territory_code(territory_code, resolve_aliases=True,
                              resolve_top_country=False):
     """Normalize any string into a territory code.
 
+    Results are memoized in ``TERRITORY_CODE_CACHE``.
+
     :param territory_code: The input string to normalize.
     :param resolve_aliases: Trigger alias computation.
     :param resolve_top_country: Trigger foreign country computation.
     :return: The resolved territory code.
     """
+    cache_key = (territory_code, resolve_aliases, resolve_top_country)
+    result = TERRITORY_CODE_CACHE.get(cache_key)
+    if result is None:
+        try:
+            result = (_normalize_territory_code(*cache_key), None)
+        except ValueError as exception:
+            # Unrecognized codes are cached too, as they are the most
+            # expensive to process.
+            result = (None, '{}'.format(exception))
+        TERRITORY_CODE_CACHE.set(cache_key, result)
+    code, error = result
+    if error:
+        raise ValueError(error)
+    return code
+
+
+def _normalize_territory_code(territory_code, resolve_aliases,
+                              resolve_top_country):
+    """ Uncached implementation of ``normalize_territory_code()``. """
     territory_code = territory_code.strip().upper()
     if territory_code not in supported_territory_codes():
         raise ValueError(
@@ -255,6 +720,125 @@ def normalize_territory_code(territory_code, resolve_aliases=True,
     return territory_code
 
 
+def normalize_territory_codes(territory_codes, resolve_aliases=True,
+                              resolve_top_country=False):
+    """Normalize a batch of strings into territory codes.
+
+    Each distinct value is normalized only once. Unrecognized values are not
+    raising exceptions, but are reported in a mask and normalized to ``None``.
+
+    :param territory_codes: An iterable of strings. NumPy arrays are supported
+    too, in which case results are returned as NumPy arrays.
+    :param resolve_aliases: Trigger alias computation.
+    :param resolve_top_country: Trigger foreign country computation.
+    :return: A tuple of the list of resolved territory codes and the list of
+    booleans flagging unrecognized codes.
+    """
+    resolved = {}
+    codes = []
+    invalid = []
+    for territory_code in territory_codes:
+        try:
+            code = resolved[territory_code]
+        except KeyError:
+            try:
+                code = normalize_territory_code(
+                    territory_code, resolve_aliases=resolve_aliases,
+                    resolve_top_country=resolve_top_country)
+            except (ValueError, AttributeError):
+                code = None
+            resolved[territory_code] = code
+        codes.append(code)
+        invalid.append(code is None)
+
+    # Only consider NumPy if already loaded by the caller.
+    numpy = sys.modules.get('numpy')
+    if numpy is not None and isinstance(territory_codes, numpy.ndarray):
+        return (
+            numpy.array(codes, dtype=object),
+            numpy.array(invalid, dtype=bool))
+    return codes, invalid
+
+
+def _territory_id(territory_code):
+    """ Return the ID of any territory code in the ``TerritoryTable``.
+
+    Raises ``ValueError`` for unrecognized territory codes.
+    """
+    territory_code = COUNTRY_ALIAS_TO_SUBDIVISION.get(
+        territory_code, territory_code)
+    return territory_table().code_to_id(
+        normalize_territory_code(territory_code))
+
+
+def _ancestor_id(ancestor_code):
+    """ Return the ID of a containing territory in the ``TerritoryTable``.
+
+    Reserved codes only stand for part of the country they are normalized to,
+    so they can't contain other territories. Raises ``ValueError`` for those
+    and for unrecognized territory codes.
+    """
+    if ancestor_code.strip().upper() in RESERVED_COUNTRY_CODES:
+        raise ValueError(
+            "{!r} reserved code doesn't stand for a whole territory.".format(
+                ancestor_code))
+    return _territory_id(ancestor_code)
+
+
+def is_within(territory_code, ancestor_code):
+    """ Check if a territory is contained in another.
+
+    A territory is considered to be within itself. Foreign territories are
+    within their main country. Reserved codes (see ``RESERVED_COUNTRY_CODES``)
+    are within their country, but are not accepted as ancestors.
+
+    :param territory_code: Code of the territory to locate.
+    :param ancestor_code: Code of the supposedly containing territory.
+    :return: A boolean.
+    """
+    return territory_table().is_within(
+        _territory_id(territory_code), _ancestor_id(ancestor_code))
+
+
+def is_within_many(territory_codes, ancestor_code):
+    """ Batch version of ``is_within()``.
+
+    Unrecognized territory codes are considered outside of the ancestor.
+
+    :param territory_codes: An iterable of territory codes. NumPy arrays are
+    supported too, in which case a NumPy array is returned.
+    :param ancestor_code: Code of the supposedly containing territory.
+    :return: A list of booleans.
+    """
+    table = territory_table()
+    ancestor_id = _ancestor_id(ancestor_code)
+    entry_id = table.tree_entries[ancestor_id]
+    exit_id = table.tree_exits[ancestor_id]
+
+    # Containment is only computed once per distinct value.
+    resolved = {}
+    results = []
+    for territory_code in territory_codes:
+        try:
+            result = resolved[territory_code]
+        except KeyError:
+            try:
+                territory_id = _territory_id(territory_code)
+            except (ValueError, AttributeError):
+                result = False
+            else:
+                result = (entry_id <= table.tree_entries[territory_id] <=
+                          exit_id)
+            resolved[territory_code] = result
+        results.append(result)
+
+    # Only consider NumPy if already loaded by the caller.
+    numpy = sys.modules.get('numpy')
+    if numpy is not None and isinstance(territory_codes, numpy.ndarray):
+        return numpy.array(results, dtype=bool)
+    return results
+
+
 def territory_attachment(country_code):
     """Returns the ISO-3166 alpha2 country_code of the country of which the
     given country is part of.
@@ -283,11 +867,7 @@ def country_from_subdivision(subdivision_code):
         return code
 
     # Try to extract country code from subdivision.
-    try:
-        subdiv = subdivisions.get(code=code)
-    except KeyError:
-        return None
-    return subdiv.country_code
+    return territory_data()['subdivision_countries'].get(code)
 
 
 def default_subdivision_code(country_code):
@@ -299,22 +879,26 @@ def default_subdivision_code(country_code):
     :param country_code: Country code to find subdivision for.
     :return: The subdivision key if found, None otherwise.
     """
-    # Build the reverse index of the subdivision/country alias mapping.
-    default_subdiv = {}
-    for subdiv_code, alias_code in SUBDIVISION_COUNTRIES.items():
-        # Skip non-country
-        if len(alias_code) == 2:
-            default_subdiv.setdefault(alias_code, set()).add(subdiv_code)
+    return DEFAULT_SUBDIVISIONS.get(country_code)
 
-    # Include countries directly mapping to a subdivision.
-    for alias_code, subdiv_code in COUNTRY_ALIAS_TO_SUBDIVISION.items():
-        default_subdiv.setdefault(alias_code, set()).add(subdiv_code)
 
-    default_subdivisions = default_subdiv.get(country_code)
+def subdivision_children_index():
+    """ Return the index of direct children of each territory.
 
-    if default_subdivisions and len(default_subdivisions) == 1:
-        return default_subdivisions.pop()
-    return None
+    Keys are normalized country and subdivision codes, values are frozensets
+    of the subdivision codes directly attached to them. Top-level subdivisions
+    are attached to their country.
+    """
+    return territory_data()['children_index']
+
+
+def territory_descendants_index():
+    """ Return the index of all descendants of each territory.
+
+    Keys are normalized country and subdivision codes, values are frozensets
+    of subdivision codes from all sub-levels.
+    """
+    return territory_data()['descendants_index']
 
 
 def territory_children_codes(territory_code, include_self=False):
@@ -322,25 +906,9 @@ def territory_children_codes(territory_code, include_self=False):
 
     All returned codes are normalized, including self.
     """
-    codes = set()
-
     code = normalize_territory_code(territory_code)
 
-    # We have a country code, look for matching subdivisions in one pass.
-    if code in supported_country_codes():
-        codes.update(imap(
-            attrgetter('code'),
-            ifilter(lambda subdiv: subdiv.country_code == code, subdivisions)))
-
-    # Engage the stupid per-level recursive brute-force search as pycountry
-    # only expose the child-parent relationship upwards.
-    else:
-        direct_children_codes = set(imap(
-            attrgetter('code'),
-            ifilter(lambda subdiv: subdiv.parent_code == code, subdivisions)))
-        for child_code in direct_children_codes:
-            codes.update(
-                territory_children_codes(child_code, include_self=True))
+    codes = set(territory_descendants_index().get(code, ()))
 
     if include_self:
         codes.add(code)
@@ -355,47 +923,28 @@ def territory_parents(territory_code, include_country=True):
     objects, starting from the provided territory and up its way to the top
     administrative territory (i.e. country).
     """
-    tree = []
+    from pycountry import countries, subdivisions
 
-    # Retrieving subdivision from alias to get full paternity
-    territory_code = COUNTRY_ALIAS_TO_SUBDIVISION.get(territory_code,
-                                                      territory_code)
-    # If the provided territory code is a country, return it right away.
-    territory_code = normalize_territory_code(territory_code)
-    if territory_code in supported_country_codes():
-        if include_country:
-            tree.append(countries.get(alpha_2=territory_code))
-        return tree
-
-    # Else, resolve the territory as if it's a subdivision code.
-    subdivision_code = territory_code
-    while subdivision_code:
-        subdiv = subdivisions.get(code=subdivision_code)
-        tree.append(subdiv)
-        if not subdiv.parent_code:
-            break
-        subdivision_code = subdiv.parent_code
-
-    # Return country
-    if include_country:
-        tree.append(subdivisions.get(code=subdivision_code).country)
-
-    return tree
+    country_codes = territory_data()['country_codes']
+    return [
+        countries.get(alpha_2=code) if code in country_codes
+        else subdivisions.get(code=code)
+        for code in territory_parents_codes(
+            territory_code, include_country=include_country)]
 
 
 def territory_parents_codes(territory_code, include_country=True):
     """ Like territory_parents but return normalized codes instead of objects.
+
+    Codes are returned as a tuple, looked up from the precomputed chain of
+    ancestors of the territory.
     """
-    for territory in territory_parents(
-            territory_code, include_country=include_country):
-        full_class_name = '{}.{}'.format(
-            territory.__module__, territory.__class__.__name__)
-        if full_class_name == 'pycountry.db.Country':
-            yield territory.alpha_2
-        elif full_class_name == 'pycountry.db.Subdivision':
-            yield territory.code
-        else:
-            raise ValueError("Unrecognized {!r} territory.".format(territory))
+    # Retrieving subdivision from alias to get full paternity
+    territory_code = COUNTRY_ALIAS_TO_SUBDIVISION.get(territory_code,
+                                                      territory_code)
+    territory_code = normalize_territory_code(territory_code)
+    ancestors = territory_data()['ancestors_index'][territory_code]
+    return ancestors if include_country else ancestors[:-1]
 
 
 def country_aliases(territory_code):
@@ -403,27 +952,19 @@ def country_aliases(territory_code):
 
     Mainly used to check if a non-normalized country code can safely be
     replaced by its normalized form.
+
+    Aliases of all supported territories are precomputed and returned as
+    frozensets. Raises ``KeyError`` for unrecognized territory codes.
     """
-    country_codes = set()
+    return territory_data()['aliases_index'][territory_code]
 
-    # Add a country code right away in our aliases.
-    if territory_code in supported_country_codes():
-        country_codes.add(territory_code)
 
-    # A subdivision code triggers a walk along the non-normalized parent tree
-    # and look for aliases at each level.
-    else:
-        subdiv = subdivisions.get(code=territory_code)
-        parent_code = subdiv.parent_code
-        if not parent_code:
-            parent_code = subdiv.country.alpha_2
-        country_codes.update(country_aliases(parent_code))
-        # Adding subdivision's country alias
-        if territory_code in SUBDIVISION_COUNTRIES:
-            country_codes.update({SUBDIVISION_COUNTRIES.get(territory_code)})
-
-    # Hunt for aliases
-    for mapped_code in REVERSE_MAPPING.get(territory_code, []):
-        country_codes.update(country_aliases(mapped_code))
-
-    return country_codes
+def country_aliases_many(territory_codes):
+    """ Batch version of ``country_aliases()``.
+
+    :param territory_codes: An iterable of territory codes.
+    :return: A list of frozensets of aliases, one per provided code.
+    Unrecognized territory codes gets ``None``.
+    """
+    aliases_index = territory_data()['aliases_index']
+    return [aliases_index.get(code) for code in territory_codes]
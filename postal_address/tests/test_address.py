@@ -15,14 +15,39 @@ from __future__ import (
     unicode_literals
 )
 
+import pickle
+import subprocess
 import sys
 import textwrap
 import unittest
 from decimal import Decimal
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 from pycountry import countries, subdivisions
 
-from postal_address.address import Address, InvalidAddress, random_address
+import postal_address.address
+from postal_address.address import (
+    NORMALIZATION_CACHE,
+    Address,
+    BaseAddress,
+    FINGERPRINT_SIZE,
+    CompactAddress,
+    FrozenAddress,
+    RENDERERS,
+    InvalidAddress,
+    ValidationResult,
+    address_fingerprints,
+    normalize_postal_code,
+    normalize_postal_codes,
+    random_address,
+    register_render_template,
+    render_default,
+    render_many
+)
 from postal_address.territory import (
     supported_country_codes,
     supported_territory_codes,
@@ -31,6 +56,12 @@ from postal_address.territory import (
 
 class TestAddressIO(unittest.TestCase):
 
+    def test_abstract_base(self):
+        # Storage hooks are only implemented by subclasses.
+        with self.assertRaises(TypeError):
+            # pylint: disable=abstract-class-instantiated
+            BaseAddress(line1='1 Infinite Loop')
+
     def test_default_values(self):
         address = Address(
             line1='10, avenue des Champs Elysées',
@@ -212,6 +243,36 @@ class TestAddressIO(unittest.TestCase):
             "subdivision_type_name=None, "
             "valid=True)")
 
+    def test_territory_object_cache(self):
+        lookups = []
+
+        def counted(method):
+            def wrapper(**kwargs):
+                lookups.append(kwargs)
+                return method(**kwargs)
+            return wrapper
+
+        address = Address(
+            line1='Rue de Rivoli', postal_code='75001', city_name='Paris',
+            subdivision_code='FR-75')
+        countries.get = counted(countries.get)
+        subdivisions.get = counted(subdivisions.get)
+        try:
+            address.render()
+            repr(address)
+            self.assertEquals(
+                lookups, [{'alpha_2': 'FR'}, {'code': 'FR-75'}])
+
+            # Changing codes invalidates the cache.
+            del lookups[:]
+            address.subdivision_code = 'FR-69'
+            self.assertEquals(address.subdivision_name, 'Rhône')
+            self.assertEquals(address.country_name, 'France')
+            self.assertEquals(lookups, [{'code': 'FR-69'}])
+        finally:
+            del countries.get
+            del subdivisions.get
+
     def test_rendering(self):
         # Test subdivision-less rendering.
         address = Address(
@@ -301,6 +362,12 @@ class TestAddressIO(unittest.TestCase):
             EC1A 1HQ - London, City of
             United Kingdom"""))
 
+    def test_lazy_faker_import(self):
+        # Faker is only loaded when generating random addresses.
+        subprocess.check_call([sys.executable, '-c', (
+            "import sys, postal_address.address; "
+            "assert 'faker' not in sys.modules")])
+
     def test_random_address(self):
         """ Test generation, validation and rendering of random addresses. """
         for _ in range(999):
@@ -309,6 +376,536 @@ class TestAddressIO(unittest.TestCase):
             address.render()
 
 
+class TestCompactAddress(unittest.TestCase):
+
+    def test_no_instance_dict(self):
+        address = CompactAddress(
+            line1='1 Infinite Loop', postal_code='95014',
+            city_name='Cupertino', country_code='US')
+        self.assertFalse(hasattr(address, '__dict__'))
+        with self.assertRaises(AttributeError):
+            address.unknown_field = 'foo'
+
+    def test_same_as_address(self):
+        fields = {
+            'line1': '10  Downing Street',
+            'postal_code': 'sw1a 2aa',
+            'city_name': 'London',
+            'subdivision_code': 'gb-wsm'}
+        address = Address(**fields)
+        compact = CompactAddress(**fields)
+        self.assertEquals(sorted(compact.items()), sorted(address.items()))
+        self.assertEquals(sorted(compact.keys()), sorted(address.keys()))
+        self.assertEquals(len(compact), len(address))
+        self.assertEquals(compact.render(), address.render())
+        self.assertEquals(
+            repr(compact),
+            repr(address).replace('Address(', 'CompactAddress(', 1))
+        self.assertEquals(compact.country_code, 'GB')
+        self.assertEquals(compact.subdivision_code, 'GB-WSM')
+        self.assertEquals(compact.country_area_code, 'GB-ENG')
+        self.assertEquals(
+            compact['london_borough_type_name'], 'London borough')
+        self.assertTrue(compact.valid)
+
+    def test_field_access(self):
+        address = CompactAddress(
+            line1='Rue de Rivoli', postal_code='75001', city_name='Paris',
+            subdivision_code='FR-75')
+        self.assertEquals(address.country_code, 'FR')
+        self.assertEquals(
+            address['metropolitan_region_area_code'], 'FR-IDF')
+
+        # Metadata can't be set, but can be deleted.
+        with self.assertRaises(KeyError):
+            address['metropolitan_region_area_code'] = 'FR-NOR'
+        del address['metropolitan_region_area_code']
+        self.assertNotIn('metropolitan_region_area_code', address.keys())
+        with self.assertRaises(KeyError):
+            del address['metropolitan_region_area_code']
+
+        # Type checks apply to attributes too.
+        with self.assertRaises(TypeError):
+            address.line1 = 42
+
+        # Metadata follow the subdivision code.
+        address.subdivision_code = None
+        self.assertNotIn('metropolitan_region_name', address.keys())
+        self.assertFalse(hasattr(address, 'metropolitan_region_name'))
+        address.normalize()
+        self.assertEquals(address.country_code, 'FR')
+        self.assertIsNone(address.subdivision_code)
+        address.validate()
+
+        del address['line1']
+        self.assertIsNone(address.line1)
+        self.assertFalse(address.valid)
+
+    def test_restore_deleted_metadata(self):
+        for address_class in (Address, CompactAddress):
+            address = address_class(
+                line1='Rue de Rivoli', postal_code='75001',
+                city_name='Paris', subdivision_code='FR-75')
+            del address['metropolitan_region_name']
+            address.subdivision_code = 'FR-69'
+            address.city_name = 'Lyon'
+            address.normalize()
+            self.assertEquals(
+                address['metropolitan_region_name'], 'Auvergne-Rhône-Alpes')
+
+
+class TestNormalizationCache(unittest.TestCase):
+
+    def setUp(self):
+        NORMALIZATION_CACHE.clear()
+        NORMALIZATION_CACHE.resize(16)
+
+    def tearDown(self):
+        NORMALIZATION_CACHE.resize(0)
+        NORMALIZATION_CACHE.ttl = None
+        NORMALIZATION_CACHE.clear()
+
+    def test_disabled_by_default(self):
+        NORMALIZATION_CACHE.resize(0)
+        Address(line1='Rue de Rivoli', postal_code='75001', city_name='Paris',
+                country_code='FR')
+        self.assertEquals(len(NORMALIZATION_CACHE), 0)
+
+    def test_cached_normalization(self):
+        fields = {
+            'line1': ' 10  Downing Street', 'postal_code': 'sw1a 2aa',
+            'city_name': 'London', 'subdivision_code': 'gb-wsm'}
+        address = Address(**fields)
+        self.assertEquals(NORMALIZATION_CACHE.info()['misses'], 1)
+        for address_class in (Address, CompactAddress):
+            cached = address_class(**fields)
+            self.assertEquals(sorted(cached.items()), sorted(address.items()))
+        self.assertEquals(NORMALIZATION_CACHE.info()['hits'], 2)
+
+        # Normalization mode is part of the key.
+        Address(strict=False, **fields)
+        self.assertEquals(NORMALIZATION_CACHE.info()['misses'], 2)
+
+    def test_cached_error(self):
+        fields = {
+            'line1': 'Rue de la Loi', 'postal_code': '1000',
+            'city_name': 'Brussels', 'country_code': ' fr',
+            'subdivision_code': 'BE-BRU'}
+        errors = []
+        address = CompactAddress()
+        NORMALIZATION_CACHE.clear()
+        for _ in range(2):
+            for field_id, value in fields.items():
+                address[field_id] = value
+            with self.assertRaises(InvalidAddress) as expt:
+                address.normalize()
+            errors.append(expt.exception)
+            self.assertEquals(address.country_code, 'FR')
+        self.assertEquals(NORMALIZATION_CACHE.info()['hits'], 1)
+        self.assertIsNot(errors[0], errors[1])
+        self.assertEquals(str(errors[0]), str(errors[1]))
+        self.assertEquals(
+            errors[0].inconsistent_fields, errors[1].inconsistent_fields)
+
+    def test_ttl(self):
+        now = [0]
+        timer = NORMALIZATION_CACHE.timer
+        NORMALIZATION_CACHE.timer = lambda: now[0]
+        NORMALIZATION_CACHE.ttl = 60
+        try:
+            Address(line1='Rue de Rivoli', postal_code='75001',
+                    city_name='Paris', country_code='FR')
+            now[0] = 60
+            Address(line1='Rue de Rivoli', postal_code='75001',
+                    city_name='Paris', country_code='FR')
+        finally:
+            NORMALIZATION_CACHE.timer = timer
+        self.assertEquals(NORMALIZATION_CACHE.info()['hits'], 0)
+        self.assertEquals(NORMALIZATION_CACHE.info()['expirations'], 1)
+
+
+class TestIncrementalNormalization(unittest.TestCase):
+
+    def setUp(self):
+        self.resolve_territory = postal_address.address.resolve_territory
+        self.resolutions = []
+
+        def counted_resolve_territory(*args):
+            self.resolutions.append(args)
+            return self.resolve_territory(*args)
+        postal_address.address.resolve_territory = counted_resolve_territory
+
+    def tearDown(self):
+        postal_address.address.resolve_territory = self.resolve_territory
+
+    def test_dirty_fields(self):
+        for address_class in (Address, CompactAddress):
+            address = address_class(
+                line1='Rue de Rivoli', postal_code='75001',
+                city_name='Paris', country_code='FR')
+            self.assertEquals(address.dirty_fields, frozenset())
+            address.line2 = 'foo'
+            del address['postal_code']
+            self.assertEquals(
+                address.dirty_fields, frozenset(['line2', 'postal_code']))
+            address.normalize()
+            self.assertEquals(address.dirty_fields, frozenset())
+
+    def test_skip_territory_resolution(self):
+        for address_class in (Address, CompactAddress):
+            address = address_class(
+                line1='Rue de Rivoli', postal_code='75001',
+                city_name='Paris', subdivision_code='FR-75')
+            metadata = [
+                item for item in address.items()
+                if item[0] not in Address.BASE_FIELD_IDS]
+            del self.resolutions[:]
+
+            address.line2 = '  1er   étage '
+            address.postal_code = 'f-75001'
+            address.normalize()
+            self.assertEquals(self.resolutions, [])
+            self.assertEquals(address.line2, '1er étage')
+            self.assertEquals(address.postal_code, 'F-75001')
+            self.assertEquals(address.country_code, 'FR')
+            self.assertEquals(sorted(metadata), sorted(
+                item for item in address.items()
+                if item[0] not in Address.BASE_FIELD_IDS))
+
+            # Blank lines are still swapped.
+            address.line1 = ' '
+            address.normalize()
+            self.assertEquals(address.line1, '1er étage')
+            self.assertIsNone(address.line2)
+            self.assertEquals(self.resolutions, [])
+
+            # Nothing to do on clean addresses.
+            address.normalize()
+            self.assertEquals(self.resolutions, [])
+
+            # Territory fields trigger territory resolution.
+            address.city_name = 'Lyon'
+            address.normalize()
+            self.assertEquals(len(self.resolutions), 1)
+            address.subdivision_code = 'FR-69'
+            address.normalize()
+            self.assertEquals(len(self.resolutions), 2)
+            self.assertEquals(address.metropolitan_department_name, 'Rhône')
+
+            # So does a change of normalization mode.
+            address.normalize(strict=False)
+            self.assertEquals(len(self.resolutions), 3)
+
+    def test_restore_deleted_metadata(self):
+        for address_class in (Address, CompactAddress):
+            address = address_class(
+                line1='Rue de Rivoli', postal_code='75001',
+                city_name='Paris', subdivision_code='FR-75')
+            metadata = sorted(address.items())
+            del address['metropolitan_department']
+            self.assertEquals(
+                address.dirty_fields, frozenset(['subdivision_code']))
+
+            # Deleted metadata are restored like on a full normalization.
+            address.normalize()
+            self.assertEquals(sorted(address.items()), metadata)
+            self.assertEquals(address.dirty_fields, frozenset())
+
+    def test_failed_normalization(self):
+        address = Address(
+            line1='Rue de Rivoli', postal_code='75001', city_name='Paris',
+            country_code='FR')
+        address.subdivision_code = 'BE-BRU'
+        with self.assertRaises(InvalidAddress):
+            address.normalize()
+
+        # Failed normalizations are fully performed again.
+        self.assertEquals(address.dirty_fields, Address.BASE_FIELD_IDS)
+        with self.assertRaises(InvalidAddress):
+            address.normalize()
+
+
+class TestFromNormalized(unittest.TestCase):
+
+    def test_same_as_normalized(self):
+        for address_class in (Address, CompactAddress):
+            address = address_class(
+                line1='10  Downing Street', postal_code='sw1a 2aa',
+                city_name='London', subdivision_code='GB-WSM')
+            trusted = address_class.from_normalized(
+                *[address[field_id] for field_id in (
+                    'line1', 'line2', 'postal_code', 'city_name',
+                    'country_code', 'subdivision_code')])
+            self.assertIsInstance(trusted, address_class)
+            self.assertEquals(sorted(trusted.items()), sorted(address.items()))
+            self.assertEquals(trusted.render(), address.render())
+            self.assertEquals(trusted.dirty_fields, frozenset())
+            self.assertTrue(trusted.valid)
+
+    def test_no_normalization(self):
+        address = Address.from_normalized(
+            line1=' foo  bar ', postal_code='abc', country_code='ZZ')
+        self.assertEquals(address.line1, ' foo  bar ')
+        self.assertEquals(address.postal_code, 'abc')
+        self.assertFalse(address.valid)
+
+        # Normalization is only triggered by changes.
+        address.normalize()
+        self.assertEquals(address.line1, ' foo  bar ')
+        address.line2 = None
+        address.normalize()
+        self.assertEquals(address.line1, ' foo  bar ')
+        address.normalize(strict=False)
+        self.assertEquals(address.line1, 'foo bar')
+        self.assertIsNone(address.country_code)
+
+    def test_lazy_metadata(self):
+        address = Address.from_normalized(
+            line1='Rue de Rivoli', postal_code='75001', city_name='Paris',
+            country_code='FR', subdivision_code='FR-75')
+        self.assertEquals(address._pending_metadata, 'FR-75')
+        self.assertEquals(address.metropolitan_region_area_code, 'FR-IDF')
+        self.assertIsNone(address._pending_metadata)
+
+        # Pending metadata are loaded before being replaced.
+        address = Address.from_normalized(
+            line1='Rue de Rivoli', postal_code='75001', city_name='Paris',
+            country_code='FR', subdivision_code='FR-75')
+        address.subdivision_code = 'FR-69'
+        address.normalize()
+        self.assertEquals(address['metropolitan_department_name'], 'Rhône')
+        self.assertEquals(
+            address['metropolitan_region_name'], 'Auvergne-Rhône-Alpes')
+
+    def test_check_rate(self):
+        fields = {
+            'line1': 'Rue de Rivoli', 'postal_code': '75001',
+            'city_name': 'Paris', 'country_code': 'FR'}
+        Address.from_normalized(check_rate=1, **fields)
+        CompactAddress.from_normalized(check_rate=1, **fields)
+
+        fields['postal_code'] = 'f 75001'
+        # Checks are sampled.
+        Address.from_normalized(check_rate=0, **fields)
+        with self.assertRaises(ValueError) as expt:
+            Address.from_normalized(check_rate=1, **fields)
+        self.assertIn(
+            "postal_code='F 75001' instead of 'f 75001'",
+            str(expt.exception))
+
+        fields['country_code'] = 'BE'
+        fields['subdivision_code'] = 'FR-75'
+        with self.assertRaises(ValueError):
+            CompactAddress.from_normalized(check_rate=1, **fields)
+
+
+class TestFrozenAddress(unittest.TestCase):
+
+    # Slots are set with object.__setattr__(), which pylint doesn't follow.
+    # pylint: disable=no-member
+
+    def test_freeze(self):
+        address = Address(
+            line1='10  Downing Street', postal_code='sw1a 2aa',
+            city_name='London', subdivision_code='GB-WSM')
+        frozen = address.freeze()
+        self.assertIsInstance(frozen, FrozenAddress)
+        self.assertEquals(frozen.line1, '10 Downing Street')
+        self.assertEquals(frozen.country_code, 'GB')
+        self.assertEquals(tuple(frozen), (
+            '10 Downing Street', None, 'SW1A 2AA', 'London', 'GB', 'GB-WSM'))
+        self.assertEquals(CompactAddress.from_normalized(
+            *frozen).freeze(), frozen)
+
+        # Frozen addresses are snapshots.
+        address.line2 = 'First floor'
+        self.assertIsNone(frozen.line2)
+        self.assertNotEquals(address.freeze(), frozen)
+
+        thawed = frozen.thaw()
+        self.assertIsInstance(thawed, Address)
+        self.assertEquals(sorted(thawed.items()), sorted(Address(
+            line1='10 Downing Street', postal_code='SW1A 2AA',
+            city_name='London', subdivision_code='GB-WSM').items()))
+        self.assertIsInstance(frozen.thaw(CompactAddress), CompactAddress)
+
+    def test_immutability(self):
+        frozen = FrozenAddress(line1='foo')
+        with self.assertRaises(AttributeError):
+            frozen.line1 = 'bar'
+        with self.assertRaises(AttributeError):
+            del frozen.line1
+        with self.assertRaises(AttributeError):
+            frozen.foo = 'bar'
+        self.assertFalse(hasattr(frozen, '__dict__'))
+
+    def test_deduplication(self):
+        addresses = [
+            Address(line1='1 Infinite Loop', postal_code='95014',
+                    city_name='Cupertino', country_code='US',
+                    subdivision_code='US-CA'),
+            Address(line1=' 1  Infinite Loop ', postal_code='95014',
+                    city_name='Cupertino', subdivision_code='us-ca'),
+            CompactAddress(line1='1 Infinite Loop', postal_code='95014',
+                           city_name='Cupertino', country_code='US',
+                           subdivision_code='US-CA'),
+            Address(line1='2 Infinite Loop', postal_code='95014',
+                    city_name='Cupertino', country_code='US',
+                    subdivision_code='US-CA')]
+        frozen = set(address.freeze() for address in addresses)
+        self.assertEquals(len(frozen), 2)
+        self.assertEquals(
+            {addresses[0].freeze(): 'foo'}[addresses[1].freeze()], 'foo')
+        self.assertNotEquals(addresses[0].freeze(), addresses[0])
+        self.assertNotEquals(FrozenAddress(), None)
+
+    def test_pickle(self):
+        frozen = FrozenAddress(line1='foo', country_code='FR')
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            unpickled = pickle.loads(pickle.dumps(frozen, protocol))
+            self.assertEquals(unpickled, frozen)
+            self.assertEquals(hash(unpickled), hash(frozen))
+
+    def test_repr(self):
+        self.assertEquals(
+            repr(FrozenAddress(line1='foo', country_code='FR')).replace(
+                "u'", "'"),
+            "FrozenAddress(line1='foo', line2=None, postal_code=None, "
+            "city_name=None, country_code='FR', subdivision_code=None)")
+
+
+class TestFingerprint(unittest.TestCase):
+
+    def test_canonical_form(self):
+        address = Address(
+            line1='10 Downing Street', postal_code='SW1A 2AA',
+            city_name='London', country_code='GB',
+            subdivision_code='GB-WSM')
+        fingerprint = address.fingerprint()
+        self.assertEquals(len(fingerprint.digest), FINGERPRINT_SIZE)
+        self.assertEquals(fingerprint.blocking_key, 'GB|GB-WSM|SW1A2AA')
+
+        # Case, whitespaces and formatting of codes are not significant.
+        variant = FrozenAddress(
+            line1=' 10  DOWNING street', postal_code='sw1a-2aa',
+            city_name='london', country_code=' gb',
+            subdivision_code='gb-wsm')
+        self.assertEquals(variant.fingerprint(), fingerprint)
+        self.assertEquals(address.freeze().fingerprint(), fingerprint)
+        self.assertEquals(
+            CompactAddress.from_normalized(*address.freeze()).fingerprint(),
+            fingerprint)
+
+    def test_distinct_fields(self):
+        address = FrozenAddress(
+            line1='1 Infinite Loop', postal_code='95014',
+            city_name='Cupertino', country_code='US',
+            subdivision_code='US-CA')
+        # Moving values between fields changes the digest.
+        other = FrozenAddress(
+            line2='1 Infinite Loop', postal_code='95014',
+            city_name='Cupertino', country_code='US',
+            subdivision_code='US-CA')
+        self.assertNotEquals(
+            address.fingerprint().digest, other.fingerprint().digest)
+        self.assertEquals(
+            address.fingerprint().blocking_key,
+            other.fingerprint().blocking_key)
+
+    def test_empty_and_unknown_territory(self):
+        self.assertEquals(
+            FrozenAddress().fingerprint().blocking_key, '||')
+        self.assertEquals(
+            FrozenAddress(country_code=' zz ').fingerprint().blocking_key,
+            'ZZ||')
+
+    def test_batch(self):
+        addresses = [
+            FrozenAddress(line1='foo', country_code='FR'),
+            Address(line1='bar', postal_code='75013', city_name='Paris',
+                    country_code='FR')]
+        self.assertEquals(
+            address_fingerprints(addresses),
+            [address.fingerprint() for address in addresses])
+        self.assertEquals(address_fingerprints([]), [])
+
+
+class TestRenderTemplates(unittest.TestCase):
+
+    US_TEMPLATE = (
+        'line1',
+        'line2',
+        (' ', ((', ', ('city_name', 'state_name')), 'postal_code')),
+        'country_name')
+
+    def tearDown(self):
+        RENDERERS.clear()
+
+    def test_default_layout(self):
+        address = Address(
+            line1='1 Infinite Loop', postal_code='95014',
+            city_name='Cupertino', subdivision_code='US-CA')
+        self.assertEquals(render_default(address), address.render())
+        self.assertEquals(
+            render_default(address, separator=' / '),
+            '1 Infinite Loop / 95014 - Cupertino, California / '
+            'United States')
+
+        # The dash is kept with a postal code and no city.
+        address = CompactAddress(postal_code='75013', country_code='FR')
+        self.assertEquals(address.render(), '75013 - \nFrance')
+
+    def test_country_template(self):
+        register_render_template('US', self.US_TEMPLATE)
+        address = Address(
+            line1='1 Infinite Loop', postal_code='95014',
+            city_name='Cupertino', subdivision_code='US-CA')
+        self.assertEquals(address.render(), textwrap.dedent("""\
+            1 Infinite Loop
+            Cupertino, California 95014
+            United States"""))
+        compact = CompactAddress(
+            line1='1 Infinite Loop', subdivision_code='US-CA')
+        self.assertEquals(
+            compact.render(separator=', '),
+            '1 Infinite Loop, California, United States')
+
+        # Other countries keep the default layout.
+        french = Address(
+            line1='BP 438', postal_code='75366', city_name='Paris',
+            country_code='FR')
+        self.assertEquals(french.render(), render_default(french))
+
+        register_render_template('US', None)
+        self.assertEquals(address.render(), render_default(address))
+
+    def test_render_many(self):
+        register_render_template('US', self.US_TEMPLATE)
+        addresses = [
+            Address(line1='1 Infinite Loop', postal_code='95014',
+                    city_name='Cupertino', subdivision_code='US-CA'),
+            CompactAddress(line1='BP 438', postal_code='75366',
+                           city_name='Paris', country_code='FR')]
+        self.assertEquals(
+            render_many(addresses),
+            [address.render() for address in addresses])
+        self.assertEquals(
+            render_many(addresses, separator=', '),
+            [address.render(separator=', ') for address in addresses])
+        self.assertEquals(render_many([]), [])
+
+    def test_invalid_template(self):
+        with self.assertRaises(ValueError):
+            register_render_template('ZZ', self.US_TEMPLATE)
+        with self.assertRaises(ValueError):
+            register_render_template('US', ('line1', ('city_name', )))
+        with self.assertRaises(ValueError):
+            register_render_template('US', (('', 'line1', 'line2'), ))
+        with self.assertRaises(ValueError):
+            register_render_template('US', ((' ', 'line1'), ))
+        self.assertEquals(RENDERERS, {})
+
+
 class TestAddressValidation(unittest.TestCase):
 
     def test_address_validation(self):
@@ -402,6 +999,37 @@ class TestAddressValidation(unittest.TestCase):
         self.assertNotIn('invalid', str(err))
         self.assertIn('inconsistent', str(err))
 
+    def test_address_check(self):
+        address = Address(
+            line1='address_line1',
+            postal_code='75000',
+            city_name='Paris',
+            country_code='FR')
+        result = address.check()
+        self.assertIsInstance(result, ValidationResult)
+        self.assertTrue(result.valid)
+        self.assertEquals(result.required_fields, set())
+        self.assertEquals(result.invalid_fields, dict())
+        self.assertEquals(result.inconsistent_fields, set())
+
+        address.line1 = None
+        address.country_code = 'ZZ'
+        address.subdivision_code = 'BE-BRU'
+        result = address.check()
+        self.assertFalse(result.valid)
+        self.assertEquals(result.required_fields, set(['line1']))
+        self.assertEquals(result.invalid_fields, {'country_code': 'ZZ'})
+        self.assertEquals(result.inconsistent_fields, set())
+
+        # The exception of a result is the one raised by validate().
+        with self.assertRaises(InvalidAddress) as expt:
+            address.validate()
+        self.assertEquals(
+            str(result.exception()), str(expt.exception))
+        self.assertEquals(
+            result.exception().invalid_fields,
+            expt.exception.invalid_fields)
+
     def test_blank_string_normalization(self):
         address = Address(
             line1='10, avenue des Champs Elysées',
@@ -515,6 +1143,27 @@ class TestAddressValidation(unittest.TestCase):
             country_code='FR')
         self.assertEqual(address.postal_code, 'AAA 77B')
 
+    def test_normalize_postal_code(self):
+        self.assertEqual(normalize_postal_code(' f  75008 '), 'F 75008')
+        self.assertEqual(normalize_postal_code(' - f- -75008- '), 'F-75008')
+        self.assertEqual(normalize_postal_code('J/PPB1>6/_'), 'JPPB16')
+        self.assertIsNone(normalize_postal_code(' *- -/ '))
+        self.assertIsNone(normalize_postal_code(''))
+        self.assertIsNone(normalize_postal_code(None))
+
+    def test_normalize_postal_codes(self):
+        self.assertEqual(
+            normalize_postal_codes(['sw1a 2aa', None, '--', 'sw1a 2aa']),
+            ['SW1A 2AA', None, None, 'SW1A 2AA'])
+        self.assertEqual(normalize_postal_codes(iter([])), [])
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed.")
+    def test_normalize_postal_codes_numpy(self):
+        codes = normalize_postal_codes(
+            numpy.array(['f-75008', ' 1234 '], dtype=object))
+        self.assertIsInstance(codes, numpy.ndarray)
+        self.assertEqual(codes.tolist(), ['F-75008', '1234'])
+
     def test_blank_line_swap(self):
         address = Address(
             line1='',
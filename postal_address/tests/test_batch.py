@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2013-2018 Scaleway and Contributors. All Rights Reserved.
+#                         Kevin Deldycke <kdeldycke@scaleway.com>
+#
+# Licensed under the BSD 2-Clause License (the "License"); you may not use this
+# file except in compliance with the License. You may obtain a copy of the
+# License at http://opensource.org/licenses/BSD-2-Clause
+
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals
+)
+
+import unittest
+from itertools import count, islice
+
+from postal_address.address import Address, InvalidAddress
+from postal_address.batch import (
+    NormalizedRow,
+    normalize_many,
+    normalize_parallel
+)
+
+ROWS = [
+    {'line1': ' 10,  avenue des Champs Elysées', 'postal_code': 'f-75008',
+     'city_name': 'Paris', 'country_code': 'fr '},
+    {'line1': '10 Downing Street', 'postal_code': 'sw1a 2aa',
+     'city_name': 'London', 'subdivision_code': 'gb-wsm'},
+    {'line1': '', 'line2': '1 Infinite Loop', 'postal_code': '95014',
+     'city_name': 'Cupertino', 'country_code': 'US',
+     'subdivision_code': 'US-CA'},
+    {'line1': 'Rue de la Loi', 'postal_code': '1000',
+     'city_name': 'Brussels', 'country_code': 'FR',
+     'subdivision_code': 'BE-BRU'},
+    {'line1': 'Nowhere', 'country_code': 'ZZ'},
+    {'line1': 'Nowhere', 'state': 'CA'},
+    {'line1': 42},
+]
+
+
+class TestNormalizeMany(unittest.TestCase):
+
+    def test_same_as_address(self):
+        for strict in (True, False):
+            results = list(normalize_many(ROWS, strict=strict))
+            self.assertEquals(len(results), len(ROWS))
+            for index, (row, result) in enumerate(zip(ROWS, results)):
+                self.assertIsInstance(result, NormalizedRow)
+                self.assertEquals(result.index, index)
+                try:
+                    address = Address(strict=strict, **row)
+                    address.validate()
+                except (KeyError, TypeError, InvalidAddress) as exception:
+                    self.assertIsNone(result.fields)
+                    self.assertIsInstance(result.error, type(exception))
+                    self.assertEquals(
+                        '{}'.format(result.error), '{}'.format(exception))
+                else:
+                    self.assertIsNone(result.error)
+                    self.assertEquals(result.fields, {
+                        field_id: address[field_id]
+                        for field_id in Address.BASE_FIELD_IDS})
+
+    def test_errors(self):
+        errors = [result.error for result in normalize_many(ROWS)]
+        self.assertIsNone(errors[0])
+        self.assertIsInstance(errors[3], InvalidAddress)
+        self.assertEquals(errors[4].required_fields, set([
+            'postal_code', 'city_name', 'country_code']))
+        self.assertIsInstance(errors[5], KeyError)
+        self.assertIsInstance(errors[6], TypeError)
+
+    def test_no_validation(self):
+        results = list(normalize_many(ROWS[4:5], validate=False))
+        self.assertIsNone(results[0].error)
+        self.assertEquals(results[0].fields['line1'], 'Nowhere')
+        self.assertIsNone(results[0].fields['country_code'])
+
+        # Inconsistencies are still detected at normalization in strict mode.
+        results = list(normalize_many(ROWS[3:4], validate=False))
+        self.assertIsInstance(results[0].error, InvalidAddress)
+
+    def test_lazyness(self):
+        rows = ({'line1': '{} rue de Rivoli'.format(i), 'postal_code': '75001',
+                 'city_name': 'Paris', 'country_code': 'FR'} for i in count())
+        results = list(islice(normalize_many(rows), 3))
+        self.assertEquals(
+            [result.fields['line1'] for result in results],
+            ['0 rue de Rivoli', '1 rue de Rivoli', '2 rue de Rivoli'])
+
+    def test_territory_cache_size(self):
+        # Disabling the cache doesn't change results.
+        self.assertEquals(
+            list(normalize_many(ROWS[:3], territory_cache_size=0)),
+            list(normalize_many(ROWS[:3])))
+
+
+class TestNormalizeParallel(unittest.TestCase):
+
+    def test_same_as_serial(self):
+        rows = ROWS * 7
+        for strict in (True, False):
+            serial = list(normalize_many(rows, strict=strict))
+            parallel = list(normalize_parallel(
+                rows, strict=strict, workers=2, chunk_size=3, max_pending=2))
+            self.assertEquals(len(parallel), len(serial))
+            for serial_row, parallel_row in zip(serial, parallel):
+                self.assertEquals(parallel_row.index, serial_row.index)
+                self.assertEquals(parallel_row.fields, serial_row.fields)
+                self.assertEquals(
+                    type(parallel_row.error), type(serial_row.error))
+                self.assertEquals(
+                    '{}'.format(parallel_row.error),
+                    '{}'.format(serial_row.error))
+
+    def test_empty_input(self):
+        self.assertEquals(list(normalize_parallel([], workers=1)), [])
+
+    def test_invalid_chunk_size(self):
+        with self.assertRaises(ValueError):
+            list(normalize_parallel(ROWS, chunk_size=0))
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2013-2018 Scaleway and Contributors. All Rights Reserved.
+#                         Kevin Deldycke <kdeldycke@scaleway.com>
+#
+# Licensed under the BSD 2-Clause License (the "License"); you may not use this
+# file except in compliance with the License. You may obtain a copy of the
+# License at http://opensource.org/licenses/BSD-2-Clause
+
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals
+)
+
+import threading
+import unittest
+
+from postal_address.cache import MemoCache
+
+
+class TestMemoCache(unittest.TestCase):
+
+    def test_lru_eviction(self):
+        cache = MemoCache(max_size=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        # Touch 'a' so 'b' becomes the least recently used.
+        self.assertEquals(cache.get('a'), 1)
+        cache.set('c', 3)
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertIn('c', cache)
+        self.assertEquals(cache.eviction_count, 1)
+
+    def test_counters(self):
+        cache = MemoCache()
+        self.assertEquals(cache.get('a'), None)
+        cache.set('a', 1)
+        self.assertEquals(cache.get('a'), 1)
+        self.assertEquals(cache.get('a', 2), 1)
+        self.assertEquals(cache.info(), {
+            'size': 1, 'max_size': 1024, 'hits': 2, 'misses': 1,
+            'evictions': 0, 'expirations': 0, 'ttl': None,
+            'hit_rate': 2 / 3})
+
+        cache.clear()
+        self.assertEquals(len(cache), 0)
+        self.assertEquals(cache.info()['hits'], 0)
+        self.assertEquals(cache.info()['hit_rate'], 0)
+
+    def test_resize(self):
+        cache = MemoCache(max_size=3)
+        for key in 'abc':
+            cache.set(key, key)
+        cache.resize(1)
+        self.assertEquals(len(cache), 1)
+        self.assertIn('c', cache)
+        self.assertEquals(cache.eviction_count, 2)
+
+        # A null size disables the cache.
+        cache.resize(0)
+        cache.set('d', 'd')
+        self.assertEquals(len(cache), 0)
+
+    def test_ttl(self):
+        now = [0]
+        cache = MemoCache(ttl=10, timer=lambda: now[0])
+        cache.set('a', 1)
+        now[0] = 5
+        cache.set('b', 2)
+        self.assertEquals(cache.get('a'), 1)
+        now[0] = 10
+        self.assertEquals(cache.get('a'), None)
+        self.assertNotIn('a', cache)
+        self.assertEquals(cache.get('b'), 2)
+        self.assertEquals(cache.expiration_count, 1)
+        self.assertEquals(cache.info()['misses'], 1)
+
+        # Items cached without TTL never expire.
+        cache.ttl = None
+        cache.set('c', 3)
+        now[0] = 1000
+        self.assertEquals(cache.get('c'), 3)
+
+    def test_threads(self):
+        cache = MemoCache(max_size=8)
+
+        def hammer():
+            for index in range(2000):
+                key = index % 13
+                if cache.get(key) is None:
+                    cache.set(key, index)
+
+        threads = [threading.Thread(target=hammer) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        info = cache.info()
+        self.assertEquals(info['hits'] + info['misses'], 8 * 2000)
+        self.assertLessEqual(info['size'], 8)
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2013-2018 Scaleway and Contributors. All Rights Reserved.
+#                         Kevin Deldycke <kdeldycke@scaleway.com>
+#
+# Licensed under the BSD 2-Clause License (the "License"); you may not use this
+# file except in compliance with the License. You may obtain a copy of the
+# License at http://opensource.org/licenses/BSD-2-Clause
+
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals
+)
+
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from postal_address.cli import column_mapping, guess_format, main
+
+CSV_INPUT = """id,line1,zip,city_name,country_code
+1, 10 avenue  des Champs Elysées,f-75008,Paris,fr
+2,Nowhere,,,ZZ
+3,"Rue de Rivoli, 1er",75001,Paris,FR
+"""
+
+JSONL_INPUT = (
+    '{"id": 1, "line1": "10 Downing Street", "postal_code": "sw1a 2aa", '
+    '"city_name": "London", "subdivision_code": "gb-wsm"}\n'
+    '\n'
+    '{"id": 2, "line1": ["42"]}\n')
+
+
+class TestCLI(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def path(self, filename, content=None):
+        path = os.path.join(self.folder, filename)
+        if content is not None:
+            with io.open(path, 'w', encoding='utf-8') as stream:
+                stream.write(content)
+        return path
+
+    def read(self, filename):
+        with io.open(self.path(filename), encoding='utf-8') as stream:
+            return stream.read().splitlines()
+
+    def test_guess_format(self):
+        self.assertEquals(guess_format('addresses.csv'), 'csv')
+        self.assertEquals(guess_format('addresses.JSONL'), 'jsonl')
+        self.assertEquals(guess_format('-'), 'csv')
+
+    def test_column_mapping(self):
+        mapping = column_mapping(['postal_code=zip'])
+        self.assertEquals(mapping['postal_code'], 'zip')
+        self.assertEquals(mapping['line1'], 'line1')
+        for item in ['zip', 'zip=postal_code', 'postal_code=']:
+            with self.assertRaises(ValueError):
+                column_mapping([item])
+
+    def test_csv(self):
+        for workers in ['1', '2']:
+            main([
+                self.path('input.csv', CSV_INPUT),
+                '--column', 'postal_code=zip',
+                '--output', self.path('output.csv'),
+                '--rejects', self.path('rejects.csv'),
+                '--workers', workers, '--chunk-size', '1'])
+            self.assertEquals(self.read('output.csv'), [
+                'id,line1,zip,city_name,country_code,line2,subdivision_code',
+                '1,10 avenue des Champs Elysées,F-75008,Paris,FR,,',
+                '3,"Rue de Rivoli, 1er",75001,Paris,FR,,'])
+            self.assertEquals(self.read('rejects.csv'), [
+                'id,line1,zip,city_name,country_code,line2,'
+                'subdivision_code,_error',
+                '2,Nowhere,,,ZZ,,,"city_name, country_code, postal_code are '
+                'required."'])
+
+    def test_jsonl(self):
+        main([
+            self.path('input.jsonl', JSONL_INPUT),
+            '--output', self.path('output.jsonl'),
+            '--rejects', self.path('rejects.jsonl')])
+        output = [json.loads(line) for line in self.read('output.jsonl')]
+        self.assertEquals(output, [{
+            'id': 1, 'line1': '10 Downing Street', 'line2': None,
+            'postal_code': 'SW1A 2AA', 'city_name': 'London',
+            'country_code': 'GB', 'subdivision_code': 'GB-WSM'}])
+        rejects = [json.loads(line) for line in self.read('rejects.jsonl')]
+        self.assertEquals(rejects, [{
+            'id': 2, 'line1': ['42'],
+            '_error': 'line1 field only accepts strings or None, not list.'}])
+
+    def test_jsonl_numbers(self):
+        main([
+            self.path('input.jsonl', (
+                '{"id": 1, "line1": "1 rue de Rivoli", "postal_code": 75001, '
+                '"city_name": "Paris", "country_code": "FR"}\n')),
+            '--output', self.path('output.jsonl')])
+        output = [json.loads(line) for line in self.read('output.jsonl')]
+        self.assertEquals(output[0]['id'], 1)
+        self.assertEquals(output[0]['postal_code'], '75001')
+
+    def test_malformed_jsonl(self):
+        for workers in ['1', '2']:
+            content = '[1, 2]\n' + JSONL_INPUT + '{"id": 3,\n'
+            main([
+                self.path('input.jsonl', content),
+                '--output', self.path('output.jsonl'),
+                '--rejects', self.path('rejects.jsonl'),
+                '--workers', workers, '--chunk-size', '1'])
+            output = [json.loads(line) for line in self.read('output.jsonl')]
+            self.assertEquals([record['id'] for record in output], [1])
+            rejects = [
+                json.loads(line) for line in self.read('rejects.jsonl')]
+            self.assertEquals(len(rejects), 3)
+            self.assertEquals(rejects[0], {
+                '_raw': '[1, 2]', '_error': 'Not a JSON object.'})
+            self.assertEquals(rejects[1]['id'], 2)
+            self.assertEquals(rejects[2]['_raw'], '{"id": 3,')
+            self.assertTrue(rejects[2]['_error'].startswith('Malformed JSON'))
+
+    def test_csv_column_union(self):
+        main([
+            self.path('first.csv', 'id,line1,postal_code\n1,BP 438,75366\n'),
+            self.path('second.csv', (
+                'id,city_name,country_code,note\n2,Paris,FR,second\n')),
+            '--no-validate', '--output', self.path('output.csv')])
+        self.assertEquals(self.read('output.csv'), [
+            'id,line1,postal_code,city_name,country_code,note,line2,'
+            'subdivision_code',
+            '1,BP 438,75366,,,,,',
+            '2,,,Paris,FR,second,,'])
+
+    def test_no_strict_no_validate(self):
+        main([
+            self.path('input.csv', CSV_INPUT),
+            '--column', 'postal_code=zip', '--no-strict', '--no-validate',
+            '--output', self.path('output.csv')])
+        self.assertEquals(len(self.read('output.csv')), 4)
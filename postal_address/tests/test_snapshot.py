@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2013-2018 Scaleway and Contributors. All Rights Reserved.
+#                         Kevin Deldycke <kdeldycke@scaleway.com>
+#
+# Licensed under the BSD 2-Clause License (the "License"); you may not use this
+# file except in compliance with the License. You may obtain a copy of the
+# License at http://opensource.org/licenses/BSD-2-Clause
+
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals
+)
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import postal_address.snapshot
+from postal_address.snapshot import (
+    SNAPSHOT_ENV,
+    build_snapshot,
+    read_snapshot,
+    write_snapshot
+)
+from postal_address.territory import (
+    TERRITORY_INDEXES,
+    compile_territory_data,
+    territory_data,
+    territory_data_fingerprint
+)
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'territory.snapshot')
+        self.environ = os.environ.get(SNAPSHOT_ENV)
+        self.default_path = postal_address.snapshot.DEFAULT_SNAPSHOT_PATH
+
+    def tearDown(self):
+        postal_address.snapshot.DEFAULT_SNAPSHOT_PATH = self.default_path
+        if self.environ is None:
+            os.environ.pop(SNAPSHOT_ENV, None)
+        else:
+            os.environ[SNAPSHOT_ENV] = self.environ
+        shutil.rmtree(self.temp_dir)
+
+    def test_round_trip(self):
+        fingerprint = territory_data_fingerprint()
+        self.assertEquals(build_snapshot(self.path), self.path)
+        data = read_snapshot(fingerprint, self.path)
+        self.assertEquals(data, compile_territory_data())
+        for key, value in data.items():
+            self.assertEquals(territory_data()[key], value)
+
+    def test_build_on_miss(self):
+        os.environ[SNAPSHOT_ENV] = self.path
+        # Bypass the cache of territory_data().
+        data = territory_data.func()
+        self.assertEquals(
+            read_snapshot(territory_data_fingerprint(), self.path), data)
+
+        # Snapshot is used as-is on the next cold start.
+        self.assertEquals(territory_data.func(), data)
+
+    def test_no_build_at_default_location(self):
+        os.environ.pop(SNAPSHOT_ENV, None)
+        postal_address.snapshot.DEFAULT_SNAPSHOT_PATH = self.path
+        data = territory_data.func()
+        self.assertFalse(os.path.exists(self.path))
+        for key in TERRITORY_INDEXES:
+            self.assertNotIn(key, data)
+
+        # But is read if built beforehand.
+        build_snapshot()
+        self.assertEquals(territory_data.func(), compile_territory_data())
+
+    def test_lazy_indexes(self):
+        # Snapshot location is not writable.
+        os.environ[SNAPSHOT_ENV] = os.path.join(
+            self.temp_dir, 'missing', 'territory.snapshot')
+        data = territory_data.func()
+        for key in TERRITORY_INDEXES:
+            self.assertNotIn(key, data)
+        self.assertFalse(os.path.exists(os.path.dirname(
+            os.environ[SNAPSHOT_ENV])))
+
+        compiled = compile_territory_data()
+        self.assertEquals(data['aliases_index'], compiled['aliases_index'])
+        self.assertEquals(
+            data['descendants_index'], compiled['descendants_index'])
+        self.assertIn('children_index', data)
+        self.assertNotIn('ancestors_index', data)
+        self.assertEquals(data['ancestors_index'], compiled['ancestors_index'])
+        self.assertEquals(data, compiled)
+        self.assertRaises(KeyError, data.__getitem__, 'unknown_index')
+
+    def test_stale_snapshot(self):
+        write_snapshot({'country_codes': frozenset()}, b'0' * 20, self.path)
+        self.assertEquals(read_snapshot(b'0' * 20, self.path), {
+            'country_codes': frozenset()})
+        self.assertIsNone(read_snapshot(b'1' * 20, self.path))
+
+    def test_invalid_snapshot(self):
+        # Missing file.
+        self.assertIsNone(read_snapshot(b'0' * 20, self.path))
+
+        # Empty file.
+        open(self.path, 'wb').close()
+        self.assertIsNone(read_snapshot(b'0' * 20, self.path))
+
+        # Truncated file.
+        write_snapshot({'country_codes': frozenset()}, b'0' * 20, self.path)
+        with open(self.path, 'rb') as snapshot:
+            content = snapshot.read()
+        with open(self.path, 'wb') as snapshot:
+            snapshot.write(content[:-3])
+        self.assertIsNone(read_snapshot(b'0' * 20, self.path))
@@ -18,26 +18,45 @@ import re
 import unittest
 from operator import attrgetter
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 from pycountry import countries, subdivisions
 
+from boltons.dictutils import FrozenDict
+
 from postal_address.address import (
     Address,
+    subdivision_derived_metadata,
     subdivision_metadata,
+    subdivision_parents_metadata,
     subdivision_type_id
 )
 from postal_address.territory import (
     COUNTRY_ALIASES,
+    DEFAULT_SUBDIVISIONS,
     SUBDIVISION_COUNTRIES,
+    TERRITORY_CODE_CACHE,
     country_aliases,
+    country_aliases_many,
     country_from_subdivision,
     default_subdivision_code,
+    is_within,
+    is_within_many,
     normalize_territory_code,
+    normalize_territory_codes,
     supported_country_codes,
     supported_subdivision_codes,
     supported_territory_codes,
+    subdivision_children_index,
     territory_attachment,
     territory_children_codes,
+    territory_descendants_index,
+    territory_parents,
     territory_parents_codes,
+    territory_table,
     FOREIGN_TERRITORIES_MAPPING, RESERVED_COUNTRY_CODES)
 
 PYCOUNTRY_CC = set(map(attrgetter('alpha_2'), countries))
@@ -112,6 +131,17 @@ class TestTerritory(unittest.TestCase):
         self.assertEquals(default_subdivision_code('FR'), None)
         self.assertEquals(default_subdivision_code('GU'), 'US-GU')
         self.assertEquals(default_subdivision_code('SJ'), None)
+        self.assertEquals(default_subdivision_code('IC'), 'ES-CN')
+
+    def test_default_subdivisions_mapping(self):
+        self.assertEquals(DEFAULT_SUBDIVISIONS['GU'], 'US-GU')
+        self.assertNotIn('SJ', DEFAULT_SUBDIVISIONS)
+        # The shared mapping is read-only.
+        with self.assertRaises(TypeError):
+            DEFAULT_SUBDIVISIONS['FR'] = 'FR-75'
+        # Repeated lookups leave the mapping untouched.
+        default_subdivision_code('GU')
+        self.assertEquals(default_subdivision_code('GU'), 'US-GU')
 
     def test_territory_children_codes(self):
         self.assertEquals(territory_children_codes('GQ'),
@@ -123,6 +153,25 @@ class TestTerritory(unittest.TestCase):
         self.assertEquals(territory_children_codes(
             'GQ-AN', include_self=True), {'GQ-AN'})
 
+    def test_territory_children_aliases(self):
+        # Children aliased to a country are normalized.
+        self.assertEquals(territory_children_codes('FR-GUA'), {'GP'})
+        self.assertIn('FR-GP', territory_children_codes('FR'))
+
+    def test_territory_children_indexes(self):
+        children_index = subdivision_children_index()
+        self.assertEquals(children_index['GQ-I'], {'GQ-AN', 'GQ-BN', 'GQ-BS'})
+        self.assertEquals(children_index['GQ'], {'GQ-C', 'GQ-I'})
+        self.assertNotIn('GQ-AN', children_index)
+
+        descendants_index = territory_descendants_index()
+        self.assertEquals(
+            descendants_index['GQ'], territory_children_codes('GQ'))
+        self.assertEquals(
+            descendants_index['GQ-I'], territory_children_codes('GQ-I'))
+        # Built only once.
+        self.assertIs(descendants_index, territory_descendants_index())
+
     def test_territory_parents_codes(self):
         self.assertEquals(
             list(territory_parents_codes('FR-59')),
@@ -136,6 +185,24 @@ class TestTerritory(unittest.TestCase):
         self.assertEquals(
             list(territory_parents_codes('FR', include_country=False)),
             [])
+        # Chains are precomputed tuples.
+        self.assertEquals(
+            territory_parents_codes('FR-75'), ('FR-75', 'FR-IDF', 'FR'))
+        self.assertEquals(
+            territory_parents_codes('fr-75', include_country=False),
+            ('FR-75', 'FR-IDF'))
+
+    def test_territory_parents(self):
+        self.assertEquals(
+            territory_parents('FR-59'), [
+                subdivisions.get(code='FR-59'),
+                subdivisions.get(code='FR-HDF'),
+                countries.get(alpha_2='FR')])
+        self.assertEquals(
+            territory_parents('TA', include_country=False),
+            [subdivisions.get(code='SH-TA')])
+        with self.assertRaises(ValueError):
+            territory_parents('XX')
 
     def test_alias_normalization(self):
         # Check country alias to a country.
@@ -205,6 +272,17 @@ class TestTerritory(unittest.TestCase):
 
         self.assertEquals(country_aliases('MC'), {'MC'})
 
+        # Aliases are precomputed and immutable.
+        self.assertIsInstance(country_aliases('FR-RE'), frozenset)
+        self.assertIs(country_aliases('FR-RE'), country_aliases('FR-RE'))
+        with self.assertRaises(KeyError):
+            country_aliases('XX')
+
+    def test_country_aliases_many(self):
+        self.assertEquals(
+            country_aliases_many(['UM-67', 'XX', 'EL']),
+            [{'US', 'UM'}, None, {'EL', 'GR'}])
+
     def test_subdivision_type_id_conversion(self):
         # Conversion of subdivision types into IDs must be python friendly
         attribute_regexp = re.compile('[a-z][a-z0-9_]*$')
@@ -260,6 +338,38 @@ class TestTerritory(unittest.TestCase):
                 else:
                     self.assertFalse(hasattr(simple_address, metadata_id))
 
+    def test_subdivision_metadata_memoization(self):
+        subdiv = subdivisions.get(code='FR-75')
+        metadata = subdivision_metadata(subdiv)
+        self.assertIsInstance(metadata, FrozenDict)
+        self.assertIs(subdivision_metadata(subdiv), metadata)
+        self.assertEquals(metadata, {
+            'metropolitan_department': subdiv,
+            'metropolitan_department_area_code': 'FR-75',
+            'metropolitan_department_name': 'Paris',
+            'metropolitan_department_type_name': 'Metropolitan department'})
+        with self.assertRaises(TypeError):
+            metadata['foo'] = 'bar'
+
+    def test_subdivision_parents_metadata(self):
+        metadata = subdivision_parents_metadata('FR-75')
+        self.assertIsInstance(metadata, FrozenDict)
+        self.assertIs(subdivision_parents_metadata('FR-75'), metadata)
+        expected = {'country_code': 'FR'}
+        expected.update(subdivision_metadata(subdivisions.get(code='FR-75')))
+        expected.update(subdivision_metadata(subdivisions.get(code='FR-IDF')))
+        self.assertEquals(metadata, expected)
+
+        # City subdivisions set the city name.
+        self.assertEquals(
+            subdivision_parents_metadata('GB-LND')['city_name'],
+            'London, City of')
+        self.assertNotIn('city_name', subdivision_derived_metadata('GB-LND'))
+        self.assertNotIn('country_code', subdivision_derived_metadata('FR-75'))
+
+        with self.assertRaises(ValueError):
+            subdivision_parents_metadata('FR-XX')
+
     def test_subdivision_parent_code(self):
         # See https://bitbucket.org/flyingcircus/pycountry/issues/13389
         self.assertEqual("GB-ENG", subdivisions.get(code='GB-STS').parent_code)
@@ -296,3 +406,143 @@ class TestTerritory(unittest.TestCase):
                                             resolve_top_country=True)
 
         self.assertEqual("BQ-BO", resolved)
+
+    def test_normalize_territory_code_cache(self):
+        TERRITORY_CODE_CACHE.clear()
+        self.assertEqual("GR", normalize_territory_code(" el "))
+        self.assertEqual("GR", normalize_territory_code(" el "))
+        self.assertEqual("GR", normalize_territory_code(
+            " el ", resolve_top_country=True))
+        self.assertEqual(TERRITORY_CODE_CACHE.hit_count, 1)
+        self.assertEqual(TERRITORY_CODE_CACHE.miss_count, 2)
+
+        # Unrecognized codes are cached too, and keep raising.
+        for _ in range(2):
+            with self.assertRaises(ValueError) as context:
+                normalize_territory_code("XX-XXX")
+            self.assertIn("'XX-XXX'", str(context.exception))
+        self.assertEqual(TERRITORY_CODE_CACHE.hit_count, 2)
+        self.assertEqual(TERRITORY_CODE_CACHE.miss_count, 3)
+
+    def test_territory_table(self):
+        table = territory_table()
+        self.assertEquals(len(table), len(PYCOUNTRY_CC) + len(PYCOUNTRY_SUB))
+
+        # Countries come first.
+        self.assertTrue(table.is_country(table.code_to_id('FR')))
+        self.assertFalse(table.is_country(table.code_to_id('FR-75')))
+
+        paris = table.code_to_id('FR-75')
+        self.assertEquals(table.id_to_code(paris), 'FR-75')
+        self.assertEquals(table.name(paris), 'Paris')
+        self.assertEquals(table.type_name(paris), 'Metropolitan department')
+        self.assertEquals(
+            table.id_to_code(table.parent_ids[paris]), 'FR-IDF')
+        self.assertEquals(table.id_to_code(table.country_ids[paris]), 'FR')
+
+        france = table.code_to_id('FR')
+        self.assertEquals(table.name(france), 'France')
+        self.assertEquals(table.type_name(france), None)
+        self.assertEquals(table.parent_ids[france], -1)
+        self.assertEquals(table.country_ids[france], france)
+
+        # Top-level subdivisions are attached to their country.
+        self.assertEquals(
+            table.parent_ids[table.code_to_id('FR-IDF')], france)
+
+        self.assertEquals(
+            list(table.codes_to_ids(['FR', 'XX', 'FR-75'])),
+            [france, -1, paris])
+        self.assertEquals(
+            table.ids_to_codes([paris, france]), ['FR-75', 'FR'])
+        with self.assertRaises(KeyError):
+            table.code_to_id('XX')
+
+        # Check table consistency against pycountry.
+        for subdiv in subdivisions:
+            subdiv_id = table.code_to_id(subdiv.code)
+            self.assertEquals(table.name(subdiv_id), subdiv.name)
+            self.assertEquals(table.type_name(subdiv_id), subdiv.type)
+            self.assertEquals(
+                table.id_to_code(table.country_ids[subdiv_id]),
+                subdiv.country_code)
+
+    def test_normalize_territory_codes(self):
+        codes, invalid = normalize_territory_codes(
+            ['fr', ' EL', 'XX', None, 'FR-GP', 'fr'])
+        self.assertEqual(codes, ['FR', 'GR', None, None, 'GP', 'FR'])
+        self.assertEqual(invalid, [False, False, True, True, False, False])
+
+        codes, invalid = normalize_territory_codes(
+            iter(['FR-GP', 'NL-BQ1']), resolve_top_country=True)
+        self.assertEqual(codes, ['FR', 'BQ-BO'])
+        self.assertEqual(invalid, [False, False])
+
+        codes, invalid = normalize_territory_codes(
+            ['FR-GP'], resolve_aliases=False)
+        self.assertEqual(codes, ['FR-GP'])
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed.")
+    def test_normalize_territory_codes_numpy(self):
+        codes, invalid = normalize_territory_codes(
+            numpy.array(['fr', 'XX', 'FR-GP'], dtype=object))
+        self.assertIsInstance(codes, numpy.ndarray)
+        self.assertEqual(codes.tolist(), ['FR', None, 'GP'])
+        self.assertEqual(invalid.dtype, bool)
+        self.assertEqual(invalid.tolist(), [False, True, False])
+
+    def test_is_within(self):
+        self.assertTrue(is_within('FR-75', 'FR-IDF'))
+        self.assertTrue(is_within('FR-75', 'FR'))
+        self.assertTrue(is_within('FR', 'FR'))
+        self.assertFalse(is_within('FR-IDF', 'FR-75'))
+        self.assertFalse(is_within('FR-75', 'DE'))
+
+        # Foreign territories and aliases are folded in the tree.
+        self.assertTrue(is_within('GP', 'FR'))
+        self.assertTrue(is_within('FR-GP', 'FR'))
+        self.assertTrue(is_within('FR-GP', 'GP'))
+        self.assertFalse(is_within('FR', 'GP'))
+        self.assertTrue(is_within('IC', 'ES'))
+        self.assertTrue(is_within('NL-BQ1', 'BQ'))
+        self.assertTrue(is_within('BQ-BO', 'NL'))
+        self.assertTrue(is_within('GB-STS', 'UK'))
+
+        # Countries aliased by a subdivision are within its parent.
+        self.assertTrue(is_within('FR-GP', 'FR-GUA'))
+        self.assertTrue(is_within('FR-RE', 'FR-LRE'))
+        self.assertTrue(is_within('FR-YT', 'FR-MAY'))
+        self.assertFalse(is_within('FR-GP', 'FR-LRE'))
+
+        with self.assertRaises(ValueError):
+            is_within('XX', 'FR')
+
+        # Reserved codes only stand for part of their country.
+        self.assertTrue(is_within('EA', 'ES'))
+        self.assertTrue(is_within('FX', 'FR'))
+        for ancestor_code in ['EA', 'ea ', 'FX', 'DG']:
+            with self.assertRaises(ValueError):
+                is_within('ES-MD', ancestor_code)
+
+        # All territories are within their parents.
+        for subdiv_code in PYCOUNTRY_SUB:
+            for parent_code in territory_parents_codes(subdiv_code):
+                self.assertTrue(is_within(subdiv_code, parent_code))
+
+        # The tree agrees with the index of descendants.
+        for code, descendants in territory_descendants_index().items():
+            for descendant_code in descendants:
+                self.assertTrue(is_within(descendant_code, code))
+
+    def test_is_within_many(self):
+        self.assertEqual(
+            is_within_many(['FR-75', 'DE', 'XX', None, 'GP', 'FR-75'], 'FR'),
+            [True, False, False, False, True, True])
+        with self.assertRaises(ValueError):
+            is_within_many(['ES-CE', 'ES-MD'], 'EA')
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed.")
+    def test_is_within_many_numpy(self):
+        within = is_within_many(numpy.array(['FR-75', 'DE']), 'FR')
+        self.assertIsInstance(within, numpy.ndarray)
+        self.assertEqual(within.tolist(), [True, False])
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2013-2018 Scaleway and Contributors. All Rights Reserved.
+#                         Kevin Deldycke <kdeldycke@scaleway.com>
+#
+# Licensed under the BSD 2-Clause License (the "License"); you may not use this
+# file except in compliance with the License. You may obtain a copy of the
+# License at http://opensource.org/licenses/BSD-2-Clause
+
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals
+)
+
+import unittest
+
+from postal_address.address import Address
+from postal_address.territory import (
+    supported_country_codes,
+    supported_territory_codes
+)
+from postal_address.vat import (
+    EU_VAT_COUNTRIES,
+    VAT_EXCLUDED_POSTAL_CODES,
+    VAT_EXCLUDED_TERRITORIES,
+    VAT_TERRITORY_ALIASES,
+    address_vat_jurisdiction,
+    vat_jurisdiction,
+    vat_jurisdiction_table,
+    vat_jurisdictions
+)
+
+
+class TestVAT(unittest.TestCase):
+
+    def test_definitions(self):
+        self.assertTrue(EU_VAT_COUNTRIES.issubset(supported_country_codes()))
+        self.assertTrue(
+            VAT_EXCLUDED_TERRITORIES.issubset(supported_territory_codes()))
+        for territory_code, country_code in VAT_TERRITORY_ALIASES.items():
+            self.assertIn(territory_code, supported_country_codes())
+            self.assertIn(country_code, EU_VAT_COUNTRIES)
+        for country_code, _ in VAT_EXCLUDED_POSTAL_CODES:
+            self.assertIn(country_code, EU_VAT_COUNTRIES)
+
+    def test_jurisdiction_table(self):
+        table = vat_jurisdiction_table()
+        self.assertEquals(set(table), supported_territory_codes())
+        self.assertEquals(table['FR'], 'FR')
+        self.assertEquals(table['FR-75'], 'FR')
+        self.assertEquals(table['EL'], 'GR')
+
+    def test_vat_jurisdiction(self):
+        self.assertEquals(vat_jurisdiction('fr'), 'FR')
+        self.assertEquals(vat_jurisdiction('FR', 'FR-75'), 'FR')
+        self.assertEquals(vat_jurisdiction('FX'), 'FR')
+        self.assertEquals(vat_jurisdiction('MC'), 'FR')
+        self.assertEquals(vat_jurisdiction('ES', 'ES-PM'), 'ES')
+        self.assertEquals(vat_jurisdiction('PT', 'PT-20'), 'PT')
+
+        # Outside of the EU.
+        self.assertEquals(vat_jurisdiction('US'), None)
+        self.assertEquals(vat_jurisdiction('CH'), None)
+
+        # Special territories of member states.
+        self.assertEquals(vat_jurisdiction('ES', 'ES-CN'), None)
+        self.assertEquals(vat_jurisdiction('ES', 'ES-TF'), None)
+        self.assertEquals(vat_jurisdiction('IC'), None)
+        self.assertEquals(vat_jurisdiction('EA'), None)
+        self.assertEquals(vat_jurisdiction('ES', 'ES-ML'), None)
+        self.assertEquals(vat_jurisdiction('GR', 'GR-69'), None)
+        self.assertEquals(vat_jurisdiction('AX'), None)
+        self.assertEquals(vat_jurisdiction('FI', 'FI-01'), None)
+        self.assertEquals(vat_jurisdiction('GP'), None)
+        self.assertEquals(vat_jurisdiction('FR', 'FR-GP'), None)
+        self.assertEquals(vat_jurisdiction('FR', 'FR-GUA'), None)
+        self.assertEquals(vat_jurisdiction('NC'), None)
+        self.assertEquals(vat_jurisdiction('FO'), None)
+
+        # Special territories identified by their postal code.
+        self.assertEquals(vat_jurisdiction('DE', postal_code='78266'), None)
+        self.assertEquals(vat_jurisdiction('DE', postal_code='78267'), 'DE')
+        self.assertEquals(vat_jurisdiction('GR', postal_code='630 86'), None)
+        self.assertEquals(vat_jurisdiction('GR', postal_code='63086'), None)
+        self.assertEquals(vat_jurisdiction('GR', postal_code='630 87'), 'GR')
+
+        with self.assertRaises(ValueError):
+            vat_jurisdiction('XX')
+        with self.assertRaises(ValueError):
+            vat_jurisdiction(None)
+
+    def test_address_vat_jurisdiction(self):
+        address = Address(
+            line1='Calle Mayor 1',
+            postal_code='35001',
+            city_name='Las Palmas',
+            subdivision_code='ES-GC')
+        self.assertEquals(address_vat_jurisdiction(address), None)
+
+        # Mount Athos, with a normalized postal code.
+        address = Address(
+            line1='Karyes',
+            postal_code='630 86',
+            city_name='Karyes',
+            country_code='GR')
+        self.assertEquals(address.postal_code, '630 86')
+        self.assertEquals(address_vat_jurisdiction(address), None)
+
+        address = Address(
+            line1='10, avenue des Champs Elysées',
+            postal_code='75008',
+            city_name='Paris',
+            country_code='FR')
+        self.assertEquals(address_vat_jurisdiction(address), 'FR')
+
+    def test_vat_jurisdictions(self):
+        address = Address(
+            line1='10, avenue des Champs Elysées',
+            postal_code='75008',
+            city_name='Paris',
+            country_code='FR')
+        jurisdictions, invalid = vat_jurisdictions([
+            address, ('ES', 'ES-CN', None), ('XX', None, None),
+            ('DE', None, '78266'), ('DE', None, '10115'), ('FR', 'FR-75')])
+        self.assertEquals(
+            jurisdictions, ['FR', None, None, None, 'DE', 'FR'])
+        self.assertEquals(
+            invalid, [False, False, True, False, False, False])
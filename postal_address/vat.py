@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2013-2018 Scaleway and Contributors. All Rights Reserved.
+#                         Kevin Deldycke <kdeldycke@scaleway.com>
+#
+# Licensed under the BSD 2-Clause License (the "License"); you may not use this
+# file except in compliance with the License. You may obtain a copy of the
+# License at http://opensource.org/licenses/BSD-2-Clause
+
+u""" Resolve the EU VAT jurisdiction of territories and addresses.
+
+The VAT jurisdiction of a territory is the EU member state whose VAT applies to
+it, or ``None`` if the territory is outside of the EU VAT area.
+
+Territories without an ISO 3166 code are only recognized by their postal code.
+Source: article 6 of the Council Directive 2006/112/EC.
+
+.. data:: EU_VAT_COUNTRIES
+
+    Country codes of the EU member states.
+
+.. data:: VAT_TERRITORY_ALIASES
+
+    Territories outside of the EU, but part of the VAT area of a member state.
+
+.. data:: VAT_EXCLUDED_TERRITORIES
+
+    Territories of member states excluded from the EU VAT area.
+
+.. data:: VAT_EXCLUDED_POSTAL_CODES
+
+    Country and postal code pairs of territories excluded from the EU VAT area,
+    but having no ISO 3166 code. Postal codes are stripped of separators.
+"""
+
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals
+)
+
+from boltons.cacheutils import cached, LRI
+from boltons.dictutils import FrozenDict
+
+from .territory import (
+    COUNTRY_ALIAS_TO_SUBDIVISION,
+    normalize_territory_code,
+    supported_territory_codes,
+    territory_data
+)
+
+EU_VAT_COUNTRIES = frozenset([
+    'AT', 'BE', 'BG', 'CY', 'CZ', 'DE', 'DK', 'EE', 'ES', 'FI', 'FR', 'GR',
+    'HR', 'HU', 'IE', 'IT', 'LT', 'LU', 'LV', 'MT', 'NL', 'PL', 'PT', 'RO',
+    'SE', 'SI', 'SK'])
+
+VAT_TERRITORY_ALIASES = {
+    'MC': 'FR',  # Monaco
+}
+
+VAT_EXCLUDED_TERRITORIES = frozenset([
+    'EA',     # Ceuta and Melilla
+    'ES-CE',  # Ceuta
+    'ES-CN',  # Canary Islands
+    'ES-ML',  # Melilla
+    'FR-CP',  # Clipperton Island
+    'FR-GUA',  # Guadeloupe
+    'FR-LRE',  # Réunion
+    'FR-MAY',  # Mayotte
+    'GR-69',  # Mount Athos
+])
+
+VAT_EXCLUDED_POSTAL_CODES = frozenset([
+    ('DE', '27498'),  # Heligoland
+    ('DE', '78266'),  # Büsingen am Hochrhein
+    ('GR', '63086'),  # Mount Athos
+    ('IT', '22061'),  # Campione d'Italia
+    ('IT', '23041'),  # Livigno
+])
+
+
+def territory_vat_jurisdiction(territory_code):
+    """ Compute the VAT jurisdiction of a territory from scratch.
+
+    Foreign territories (see ``FOREIGN_TERRITORIES_MAPPING``) are outside of
+    the EU VAT area, so their jurisdiction is derived from their own country
+    code rather than the one of their main country.
+
+    :param territory_code: A supported territory code.
+    :return: The country code of the EU member state, or ``None``.
+    """
+    if territory_code in VAT_EXCLUDED_TERRITORIES:
+        return None
+    code = normalize_territory_code(
+        COUNTRY_ALIAS_TO_SUBDIVISION.get(territory_code, territory_code))
+    ancestors = territory_data()['ancestors_index'][code]
+    if VAT_EXCLUDED_TERRITORIES.intersection(ancestors):
+        return None
+    country_code = VAT_TERRITORY_ALIASES.get(ancestors[-1], ancestors[-1])
+    if country_code in EU_VAT_COUNTRIES:
+        return country_code
+    return None
+
+
+@cached(LRI())
+def vat_jurisdiction_table():
+    """ Return the VAT jurisdiction of all supported territory codes.
+
+    :return: A read-only dictionary mapping territory codes to EU member state
+    country codes or ``None``.
+    """
+    return FrozenDict(
+        (code, territory_vat_jurisdiction(code))
+        for code in supported_territory_codes())
+
+
+def vat_jurisdiction(country_code, subdivision_code=None, postal_code=None):
+    """ Return the VAT jurisdiction of a location.
+
+    The subdivision, if any, takes precedence over the country as it is more
+    specific.
+
+    :param country_code: A territory code.
+    :param subdivision_code: An optional subdivision code.
+    :param postal_code: An optional, normalized, postal code. Its spaces and
+    hyphens are not significant.
+    :return: The country code of the EU member state, or ``None`` if the
+    location is outside of the EU VAT area.
+    """
+    territory_code = subdivision_code or country_code
+    if not territory_code:
+        raise ValueError('No territory code provided.')
+    try:
+        jurisdiction = vat_jurisdiction_table()[
+            territory_code.strip().upper()]
+    except KeyError:
+        raise ValueError(
+            'Unrecognized {!r} territory code.'.format(territory_code))
+    if jurisdiction and postal_code:
+        # Separators of postal codes are not significant.
+        postal_code = postal_code.replace(' ', '').replace('-', '')
+        if (jurisdiction, postal_code) in VAT_EXCLUDED_POSTAL_CODES:
+            return None
+    return jurisdiction
+
+
+def address_vat_jurisdiction(address):
+    """ Return the VAT jurisdiction of an ``Address``.
+
+    See ``vat_jurisdiction()``.
+    """
+    return vat_jurisdiction(
+        address.country_code, address.subdivision_code, address.postal_code)
+
+
+def vat_jurisdictions(locations):
+    """ Batch version of ``vat_jurisdiction()``.
+
+    Each distinct location is resolved only once, and unrecognized locations
+    are reported in a mask instead of raising an exception.
+
+    :param locations: An iterable of ``Address`` instances or of
+    ``(country_code, subdivision_code, postal_code)`` tuples.
+    :return: A tuple of the list of jurisdictions and the list of booleans
+    flagging unrecognized locations.
+    """
+    resolved = {}
+    jurisdictions = []
+    invalid = []
+    for location in locations:
+        if not isinstance(location, tuple):
+            location = (
+                location.country_code, location.subdivision_code,
+                location.postal_code)
+        try:
+            result = resolved[location]
+        except KeyError:
+            try:
+                result = (vat_jurisdiction(*location), False)
+            except (ValueError, AttributeError):
+                result = (None, True)
+            resolved[location] = result
+        jurisdictions.append(result[0])
+        invalid.append(result[1])
+    return jurisdictions, invalid
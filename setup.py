@@ -26,8 +26,9 @@ MODULE_NAME = 'postal_address'
 PACKAGE_NAME = MODULE_NAME.replace('_', '-')
 
 DEPENDENCIES = [
-    'boltons',
-    'Faker >= 0.8.4',
+    'boltons >= 19.0.0',
+    # Backport of concurrent.futures for Python 2.
+    'futures >= 3.0.0; python_version < "3"',
     # Freezing pycountry version because of a subdivision issue
     # Cf. https://bitbucket.org/flyingcircus/pycountry/issues/13423
     'pycountry == 18.5.26',
@@ -39,8 +40,11 @@ EXTRA_DEPENDENCIES = {
     'docs': [
         'sphinx >= 1.4',
         'sphinx_rtd_theme'],
+    'faker': [
+        'Faker >= 0.8.4'],
     'tests': [
         'coverage',
+        'Faker >= 0.8.4',
         'nose',
         'pycodestyle >= 2.1.0',
         'pylint'],
@@ -162,6 +166,7 @@ setup(
     ],
 
     entry_points={
-        'console_scripts': [],
+        'console_scripts': [
+            'postal-address = {}.cli:main'.format(MODULE_NAME)],
     }
 )